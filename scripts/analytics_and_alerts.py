@@ -8,7 +8,7 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 from utils import data_loader, config_manager
-from logger_setup import get_logger
+from logger_setup import get_logger, setup_logging
 
 # Setup logging and configuration
 logger = get_logger(__name__)
@@ -48,7 +48,8 @@ def analyze_lead_performance():
     if not os.path.exists(LEADS_PREDICTED_CSV):
         return None
     
-    df = pd.read_csv(LEADS_PREDICTED_CSV)
+    # Each analysis reads only the columns it uses, so the wide comment-text columns never load
+    df = pd.read_csv(LEADS_PREDICTED_CSV, usecols=['ConversionProbability', 'LeadQuality', 'Intent', 'LeadScore'])
     
     metrics = {
         "timestamp": datetime.now(),
@@ -70,7 +71,7 @@ def analyze_sentiment_trends():
     if not os.path.exists(ENRICHED_CSV):
         return None
     
-    df = pd.read_csv(ENRICHED_CSV)
+    df = pd.read_csv(ENRICHED_CSV, usecols=['Timestamp', 'Sentiment'])
     df['Timestamp'] = pd.to_datetime(df['Timestamp'])
     
     # Recent sentiment analysis (last 7 days)
@@ -93,7 +94,7 @@ def analyze_objection_patterns():
     if not os.path.exists(OBJECTION_CSV):
         return None
     
-    df = pd.read_csv(OBJECTION_CSV)
+    df = pd.read_csv(OBJECTION_CSV, usecols=['objections'])
     
     # Parse objections safely using ast.literal_eval instead of eval
     import ast
@@ -260,6 +261,7 @@ def send_executive_alert(report, alerts):
         print(f"Failed to send email alert: {e}")
 
 def main():
+    setup_logging()
     print("🚀 Running Professional Lead Generation Analytics & Alerts...")
     
     # Analyze current performance
@@ -8,15 +8,24 @@ Data Ingestion Script for YouTube Comments
 import os
 import time
 import random
+import httplib2
 import pandas as pd
 from googleapiclient.discovery import build
 from dotenv import load_dotenv
-from logger_setup import get_logger
+from logger_setup import get_logger, setup_logging
 from utils import config_manager, data_loader
+from data_preprocessing import clean_comment_vectorized
 import concurrent.futures
 from threading import Lock
 import threading
 from googleapiclient.errors import HttpError
+from googleapiclient.http import set_user_agent
+from googleapiclient.model import JsonModel
+
+try:
+    import orjson
+except ImportError:  # optional fast JSON parser
+    orjson = None
 
 # Get logger for this module
 logger = get_logger(__name__)
@@ -25,30 +34,78 @@ logger = get_logger(__name__)
 load_dotenv()
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 
-# Thread-safe rate limiting
-rate_limiter_lock = Lock()
-last_request_time = 0
-min_request_interval = 0.1  # 100ms between requests
+class TokenBucket:
+    """Thread-safe token bucket; the lock is only held to take a token, never while sleeping"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# Thread-safe rate limiting (10 requests/second, bursts up to 10)
+rate_limiter = TokenBucket(rate=10, capacity=10)
+
+class OrjsonModel(JsonModel):
+    """JsonModel that decodes API responses with orjson"""
+
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().deserialize(content)
+        if self._data_wrapper and "data" in body:
+            body = body["data"]
+        return body
+
+# Partial responses: only request the fields we actually store
+COMMENT_SNIPPET_FIELDS = "snippet(publishedAt,authorDisplayName,textDisplay,updatedAt)"
+COMMENT_THREAD_FIELDS = f"nextPageToken,items(snippet(totalReplyCount,topLevelComment(id,{COMMENT_SNIPPET_FIELDS})))"
+REPLY_FIELDS = f"nextPageToken,items({COMMENT_SNIPPET_FIELDS})"
+PLAYLIST_ITEM_FIELDS = "nextPageToken,items(contentDetails/videoId)"
+USER_AGENT = "youtube-ev-leadgen/0.1.0 (gzip)"  # "(gzip)" enables compressed responses
+
+# One client per worker thread (httplib2.Http is not thread-safe)
+_thread_local = threading.local()
 
 def create_youtube_client():
-    """Create a YouTube API client - thread-safe"""
-    return build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+    """Create a YouTube API client backed by a persistent HTTP connection"""
+    http = set_user_agent(httplib2.Http(), USER_AGENT)
+    model = OrjsonModel() if orjson is not None else None
+    return build('youtube', 'v3', developerKey=YOUTUBE_API_KEY,
+                 http=http, model=model, cache_discovery=False)
+
+def get_youtube_client():
+    """Return this thread's YouTube client, creating it on first use"""
+    client = getattr(_thread_local, 'youtube', None)
+    if client is None:
+        client = create_youtube_client()
+        _thread_local.youtube = client
+    return client
 
 def rate_limited_request(func, *args, **kwargs):
     """Execute API request with rate limiting and retry logic"""
-    global last_request_time
     max_retries = 3
     base_delay = 1
     
     for attempt in range(max_retries):
         try:
             # Rate limiting
-            with rate_limiter_lock:
-                now = time.time()
-                time_since_last = now - last_request_time
-                if time_since_last < min_request_interval:
-                    time.sleep(min_request_interval - time_since_last)
-                last_request_time = time.time()
+            rate_limiter.acquire()
             
             # Execute request
             return func(*args, **kwargs).execute()
@@ -81,7 +138,8 @@ def get_all_video_ids_from_playlists(youtube, playlist_ids):
                 part='contentDetails',
                 playlistId=playlist_id,
                 maxResults=50,
-                pageToken=next_page_token
+                pageToken=next_page_token,
+                fields=PLAYLIST_ITEM_FIELDS
             )
             playlist_response = playlist_request.execute()
             all_videos.extend(
@@ -104,7 +162,8 @@ def get_replies(youtube, parent_id, video_id):
             parentId=parent_id,
             textFormat="plainText",
             maxResults=100,
-            pageToken=next_page_token
+            pageToken=next_page_token,
+            fields=REPLY_FIELDS
         )
         reply_response = reply_request.execute()
         for item in reply_response['items']:
@@ -121,9 +180,11 @@ def get_replies(youtube, parent_id, video_id):
             break
     return replies
 
-def get_comments_for_video_optimized(youtube, video_id):
+def get_comments_for_video_optimized(youtube, video_id, reply_executor):
     """
     Optimized comment fetching with rate limiting and batch reply processing
+
+    Reply threads are fetched on reply_executor, shared by every video in the run.
     """
     all_comments = []
     reply_tasks = []  # Store reply fetching tasks
@@ -137,7 +198,8 @@ def get_comments_for_video_optimized(youtube, video_id):
                 videoId=video_id,
                 pageToken=next_page_token,
                 textFormat="plainText",
-                maxResults=100
+                maxResults=100,
+                fields=COMMENT_THREAD_FIELDS
             )
             
             for item in comment_response['items']:
@@ -168,25 +230,28 @@ def get_comments_for_video_optimized(youtube, video_id):
     # Process replies with controlled concurrency
     if reply_tasks:
         logger.debug(f"Processing {len(reply_tasks)} reply threads for video {video_id}")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            reply_futures = [
-                executor.submit(get_replies_optimized, create_youtube_client(), task['parent_id'], task['video_id'])
-                for task in reply_tasks
-            ]
-            
-            for future in concurrent.futures.as_completed(reply_futures):
-                try:
-                    replies = future.result(timeout=30)
-                    all_comments.extend(replies)
-                except Exception as e:
-                    logger.error(f"Error processing replies: {e}")
+        reply_futures = [
+            reply_executor.submit(get_replies_optimized, None, task['parent_id'], task['video_id'])
+            for task in reply_tasks
+        ]
+        
+        for future in concurrent.futures.as_completed(reply_futures):
+            try:
+                replies = future.result(timeout=30)
+                all_comments.extend(replies)
+            except Exception as e:
+                logger.error(f"Error processing replies: {e}")
     
     return all_comments
 
 def get_replies_optimized(youtube, parent_id, video_id):
     """
     Optimized reply fetching with rate limiting
+
+    Pass youtube=None to use the calling thread's shared client.
     """
+    if youtube is None:
+        youtube = get_youtube_client()
     replies = []
     next_page_token = None
     
@@ -198,7 +263,8 @@ def get_replies_optimized(youtube, parent_id, video_id):
                 parentId=parent_id,
                 textFormat="plainText",
                 maxResults=100,
-                pageToken=next_page_token
+                pageToken=next_page_token,
+                fields=REPLY_FIELDS
             )
             
             for item in reply_response['items']:
@@ -222,6 +288,7 @@ def get_replies_optimized(youtube, parent_id, video_id):
     return replies
 
 def main():
+    setup_logging()
     try:
         logger.info("Starting optimized YouTube data ingestion with concurrency")
         
@@ -230,7 +297,7 @@ def main():
             'PLNcgB4fXotQFFQKtR51jUKnAMOr3k_dpP'
         ]
         
-        youtube_client = create_youtube_client()
+        youtube_client = get_youtube_client()
         video_ids = get_all_video_ids_from_playlists(youtube_client, playlist_ids)
         
         if not video_ids:
@@ -250,10 +317,15 @@ def main():
         max_workers = 4  # Conservative concurrency to respect API limits
         logger.info(f"Processing {len(video_ids)} videos with {max_workers} concurrent workers")
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Clean each video's comments on a process pool while the remaining videos download.
+        # One reply pool for the whole run: 3 reply fetches per concurrent video, as before
+        clean_futures = []
+        with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as clean_pool, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=max_workers * 3) as reply_executor, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
             # Submit video processing tasks
             future_to_video = {
-                executor.submit(process_video_safely, video_id, i+1, len(video_ids)): video_id 
+                executor.submit(process_video_safely, video_id, i+1, len(video_ids), reply_executor): video_id 
                 for i, video_id in enumerate(video_ids)
             }
             
@@ -263,11 +335,14 @@ def main():
                 try:
                     video_comments = future.result(timeout=120)  # 2 minute timeout per video
                     if video_comments:
-                        all_comments.extend(video_comments)
+                        clean_futures.append(clean_pool.submit(clean_comments_batch, video_comments))
                         logger.debug(f"Collected {len(video_comments)} comments from video {video_id}")
                 except Exception as e:
                     logger.error(f"Failed to process video {video_id}: {e}")
                     failed_videos += 1
+
+            for clean_future in clean_futures:
+                all_comments.extend(clean_future.result())
         
         # Save to CSV
         if all_comments:
@@ -276,6 +351,7 @@ def main():
             raw_csv_path = file_paths['raw_comments']
             
             if data_loader.save_csv_safe(comments_df, raw_csv_path):
+                data_loader.save_parquet_sidecar(comments_df, raw_csv_path)
                 logger.info(f"✅ Saved {len(all_comments)} comments to {raw_csv_path}")
                 logger.info(f"📊 Success rate: {((len(video_ids) - failed_videos) / len(video_ids)) * 100:.1f}%")
                 return True
@@ -290,14 +366,22 @@ def main():
         logger.error(f"Data ingestion failed: {e}")
         return False
 
-def process_video_safely(video_id, current_index, total_videos):
+def clean_comments_batch(comments):
+    """
+    Add a Cleaned_Comment field to a batch of comment dicts (runs in a worker process)
+    """
+    batch_df = pd.DataFrame(comments)
+    batch_df["Cleaned_Comment"] = clean_comment_vectorized(batch_df["Comment"])
+    return batch_df.to_dict("records")
+
+def process_video_safely(video_id, current_index, total_videos, reply_executor):
     """
     Safely process a single video with error handling and logging
     """
     logger.info(f"Processing video {current_index}/{total_videos}: {video_id}")
     try:
-        youtube_client = create_youtube_client()
-        video_comments = get_comments_for_video_optimized(youtube_client, video_id)
+        youtube_client = get_youtube_client()
+        video_comments = get_comments_for_video_optimized(youtube_client, video_id, reply_executor)
         logger.debug(f"Successfully processed video {video_id}: {len(video_comments)} comments")
         return video_comments
     except Exception as e:
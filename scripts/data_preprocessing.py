@@ -2,7 +2,7 @@ import pandas as pd
 import re
 import os
 from utils import data_loader, config_manager, validator, file_utils
-from logger_setup import get_logger
+from logger_setup import get_logger, setup_logging
 
 # Use centralized configuration
 file_paths = config_manager.get_file_paths()
@@ -54,11 +54,12 @@ def clean_comment(text):
     return text
 
 def main():
+    setup_logging()
     try:
         logger.info("Starting data preprocessing pipeline")
         
-        # Load data using cached loader
-        df = data_loader.load_csv_cached(RAW_CSV)
+        # Load data, from the Parquet copy written by ingestion when it is current
+        df = data_loader.load_table(RAW_CSV)
         if df is None:
             logger.error(f"Failed to load raw data from {RAW_CSV}")
             return False
@@ -81,20 +82,26 @@ def main():
         df = df.dropna(subset=["Comment", "Username"])
         logger.info(f"After removing missing data: {len(df)} comments")
 
-        # Vectorized comment text cleaning (much faster than apply)  
-        logger.info("Cleaning comment text with vectorized operations...")
-        df["Cleaned_Comment"] = clean_comment_vectorized(df["Comment"])
+        # Vectorized comment text cleaning (much faster than apply)
+        # Ingestion already cleans comments as they arrive; only fill in what's missing
+        if "Cleaned_Comment" in df.columns:
+            logger.info("Using comment text cleaned during ingestion")
+            df["Cleaned_Comment"] = df["Cleaned_Comment"].fillna("")  # empty strings round-trip as NaN
+        else:
+            logger.info("Cleaning comment text with vectorized operations...")
+            df["Cleaned_Comment"] = clean_comment_vectorized(df["Comment"])
         
         # Remove comments that are too short or empty after cleaning
         min_length = thresholds['min_comment_length']
         df = df[df["Cleaned_Comment"].str.len() > min_length]
         logger.info(f"After removing short comments (<{min_length} chars): {len(df)} comments")
 
-        # Add comment length for future analysis
-        df["comment_length"] = df["Cleaned_Comment"].str.len()
+        # Add comment length for future analysis (uint16 is plenty for comment text)
+        df["comment_length"] = df["Cleaned_Comment"].str.len().clip(upper=65535).astype("uint16")
         
         # Save cleaned data safely
         if data_loader.save_csv_safe(df, CLEAN_CSV):
+            data_loader.save_parquet_sidecar(df, CLEAN_CSV)
             logger.info(f"Successfully saved {len(df)} cleaned comments")
             logger.debug(f"Columns: {list(df.columns)}")
             return True
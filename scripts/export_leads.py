@@ -1,6 +1,10 @@
 import pandas as pd
+import numpy as np
 import os
+import io
+from pathlib import Path
 from datetime import datetime
+from utils import data_loader, top_k_rows
 
 ENRICHED_CSV = "data/comments_data_enriched.csv"
 OBJECTION_CSV = "data/objection_analysis.csv"
@@ -15,6 +19,13 @@ LEAD_INTENTS = ["Purchase Intent", "Interest/Inquiry"]
 PRIORITIZE_POSITIVE = True
 MIN_LEAD_SCORE = 2  # Minimum score to be considered qualified
 
+YOUTUBE_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+def compute_days_ago(timestamps):
+    """Whole days since each YouTube ISO-8601 timestamp (NA if unparseable)"""
+    ts = pd.to_datetime(timestamps, format=YOUTUBE_TIMESTAMP_FORMAT, utc=True, errors="coerce")
+    return (pd.Timestamp.now(tz="UTC") - ts).dt.days.astype("Int32")
+
 def compute_enhanced_lead_score(row, user_comment_counts, has_objections=False):
     """Enhanced lead scoring with objection analysis"""
     score = 0
@@ -32,7 +43,10 @@ def compute_enhanced_lead_score(row, user_comment_counts, has_objections=False):
         score -= 1  # Negative sentiment reduces score
     
     # Engagement scoring (repeat user indicates higher interest)
-    user_comments = user_comment_counts.get(row["Username"], 0)
+    if 'user_comment_count' in row:
+        user_comments = row['user_comment_count']
+    else:
+        user_comments = user_comment_counts.get(row["Username"], 0)
     if user_comments > 3:
         score += 2  # Very engaged user
     elif user_comments > 1:
@@ -53,16 +67,17 @@ def compute_enhanced_lead_score(row, user_comment_counts, has_objections=False):
         score += 0.5
     
     # Recency bonus (more recent comments are more valuable)
-    if 'Timestamp' in row:
-        try:
-            comment_date = pd.to_datetime(row['Timestamp'])
-            days_ago = (datetime.now() - comment_date).days
-            if days_ago <= 7:
-                score += 1  # Recent comment bonus
-            elif days_ago <= 30:
-                score += 0.5
-        except:
-            pass
+    if 'days_ago' in row:
+        days_ago = row['days_ago']
+    elif 'Timestamp' in row:
+        days_ago = compute_days_ago(pd.Series([row['Timestamp']])).iloc[0]
+    else:
+        days_ago = pd.NA
+    if pd.notna(days_ago):
+        if days_ago <= 7:
+            score += 1  # Recent comment bonus
+        elif days_ago <= 30:
+            score += 0.5
     
     return round(score, 1)
 
@@ -77,13 +92,25 @@ def categorize_lead_quality(score):
     else:
         return "Unqualified"
 
+# Score breakpoints and the quality of each bucket between them (categorize_lead_quality's ladder)
+LEAD_QUALITY_BREAKS = np.array([2, 4, 6])
+LEAD_QUALITY_LABELS = np.array(["Unqualified", "Cold Lead", "Warm Lead", "Hot Lead"], dtype=object)
+
+def categorize_lead_quality_vectorized(scores):
+    """categorize_lead_quality for a whole Series of scores in one np.searchsorted call"""
+    values = scores.to_numpy(dtype=np.float64)
+    # side='right': a score equal to a breakpoint belongs to the higher bucket (>= in the ladder)
+    buckets = np.searchsorted(LEAD_QUALITY_BREAKS, values, side="right")
+    buckets[np.isnan(values)] = 0  # NaN fails every >= test
+    return pd.Series(LEAD_QUALITY_LABELS[buckets], index=scores.index)
+
 def main():
     # Load enriched data
     if not os.path.exists(ENRICHED_CSV):
         print(f"Enriched data file not found: {ENRICHED_CSV}")
         return
     
-    df = pd.read_csv(ENRICHED_CSV)
+    df = data_loader.load_table(ENRICHED_CSV)
     if df.empty:
         print("No data to process.")
         return
@@ -91,7 +118,7 @@ def main():
     # Check if objection analysis is available
     has_objection_data = os.path.exists(OBJECTION_CSV)
     if has_objection_data:
-        objection_df = pd.read_csv(OBJECTION_CSV)
+        objection_df = pd.read_csv(OBJECTION_CSV, usecols=['Username', 'Comment', 'objections'])
         # Merge objection data if available
         df = df.merge(objection_df[['Username', 'Comment', 'objections']], 
                      on=['Username', 'Comment'], how='left', suffixes=('', '_obj'))
@@ -112,22 +139,24 @@ def main():
         print("No qualified leads found.")
         return
     
-    # Calculate engagement metrics
-    user_comment_counts = df["Username"].value_counts().to_dict()
+    # Calculate engagement metrics: comments per user across all data, broadcast to each lead row
+    user_comment_counts = {}  # lookup fallback only; rows carry user_comment_count
+    leads["user_comment_count"] = df.groupby("Username")["Username"].transform("size").loc[leads.index]
     
+    # Parse timestamps once for the recency bonus
+    if "Timestamp" in leads.columns:
+        leads["days_ago"] = compute_days_ago(leads["Timestamp"])
+
     # Compute enhanced lead scores
     leads["LeadScore"] = leads.apply(
         lambda row: compute_enhanced_lead_score(row, user_comment_counts, has_objection_data), 
         axis=1
-    )
+    ).astype("float32")  # scores are multiples of 0.5, exact in float32
     
     # Add lead quality categories
-    leads["LeadQuality"] = leads["LeadScore"].apply(categorize_lead_quality)
-    
-    # Sort by score (highest first)
-    leads = leads.sort_values(by="LeadScore", ascending=False)
+    leads["LeadQuality"] = categorize_lead_quality_vectorized(leads["LeadScore"])
     
-    # Create qualified leads (above minimum score)
+    # Create qualified leads (above minimum score); only this slice is exported sorted
     qualified_leads = leads[leads["LeadScore"] >= MIN_LEAD_SCORE].copy()
     
     # Select relevant fields for export
@@ -140,80 +169,87 @@ def main():
     # Export all leads
     os.makedirs("data", exist_ok=True)
     leads[lead_fields].to_csv(LEADS_CSV, index=False)
+    data_loader.save_parquet_sidecar(leads[lead_fields], LEADS_CSV)
     print(f"Exported {len(leads)} total leads to {LEADS_CSV}")
     
     # Export qualified leads
-    qualified_leads[lead_fields].to_csv(QUALIFIED_LEADS_CSV, index=False)
+    qualified_leads.sort_values(by="LeadScore", ascending=False)[lead_fields].to_csv(QUALIFIED_LEADS_CSV, index=False)
     print(f"Exported {len(qualified_leads)} qualified leads to {QUALIFIED_LEADS_CSV}")
     
     # Generate comprehensive summary report
-    os.makedirs("reports", exist_ok=True)
-    with open(REPORT_TXT, "w") as f:
-        f.write("LEAD GENERATION SUMMARY REPORT\n")
-        f.write("=" * 50 + "\n")
-        f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        # Overall metrics
-        f.write("OVERALL METRICS:\n")
-        f.write(f"- Total comments processed: {len(df):,}\n")
-        f.write(f"- Total leads identified: {len(leads):,}\n")
-        f.write(f"- Qualified leads (score ≥ {MIN_LEAD_SCORE}): {len(qualified_leads):,}\n")
-        f.write(f"- Lead conversion rate: {len(leads)/len(df)*100:.1f}%\n")
-        f.write(f"- Qualification rate: {len(qualified_leads)/len(leads)*100:.1f}%\n\n")
-        
-        # Lead quality breakdown
-        f.write("LEAD QUALITY BREAKDOWN:\n")
-        quality_counts = leads["LeadQuality"].value_counts()
-        for quality, count in quality_counts.items():
-            f.write(f"- {quality}: {count:,} leads ({count/len(leads)*100:.1f}%)\n")
-        f.write("\n")
+    # Build the report in memory and write it out in one go
+    buf = io.StringIO()
+    buf.write("LEAD GENERATION SUMMARY REPORT\n")
+    buf.write("=" * 50 + "\n")
+    buf.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    
+    # Overall metrics
+    buf.write("OVERALL METRICS:\n")
+    buf.write(f"- Total comments processed: {len(df):,}\n")
+    buf.write(f"- Total leads identified: {len(leads):,}\n")
+    buf.write(f"- Qualified leads (score ≥ {MIN_LEAD_SCORE}): {len(qualified_leads):,}\n")
+    buf.write(f"- Lead conversion rate: {len(leads)/len(df)*100:.1f}%\n")
+    buf.write(f"- Qualification rate: {len(qualified_leads)/len(leads)*100:.1f}%\n\n")
+    
+    # Lead quality breakdown
+    buf.write("LEAD QUALITY BREAKDOWN:\n")
+    quality_counts = leads["LeadQuality"].value_counts()
+    for quality, count in quality_counts.items():
+        buf.write(f"- {quality}: {count:,} leads ({count/len(leads)*100:.1f}%)\n")
+    buf.write("\n")
+    
+    # Top scoring leads
+    buf.write("TOP 10 HIGHEST SCORING LEADS:\n")
+    top_lines = []
+    for i, (_, row) in enumerate(top_k_rows(qualified_leads, "LeadScore", 10).iterrows(), 1):
+        objection_info = ""
+        if has_objection_data and 'objections' in row:
+            objections = eval(row['objections']) if isinstance(row['objections'], str) else row['objections']
+            if objections:
+                objection_info = f" | Objections: {', '.join(objections)}"
         
-        # Top scoring leads
-        f.write("TOP 10 HIGHEST SCORING LEADS:\n")
-        for i, (_, row) in enumerate(qualified_leads.head(10).iterrows(), 1):
-            objection_info = ""
-            if has_objection_data and 'objections' in row:
+        top_lines.append(
+            f"{i:2d}. {row['Username']} (Score: {row['LeadScore']}) - {row['LeadQuality']}\n"
+            f"    Intent: {row['Intent']} | Sentiment: {row['Sentiment']}{objection_info}\n"
+            f"    Comment: {str(row['Comment'])[:100]}...\n\n"
+        )
+    buf.write("".join(top_lines))
+    
+    # Top users by lead count
+    buf.write("TOP 5 USERS BY LEAD COUNT:\n")
+    # Single grouped pass instead of re-masking the leads table per user
+    user_stats = leads.groupby("Username", observed=True)["LeadScore"].agg(["size", "mean"]).nlargest(5, "size")
+    for user, (count, avg_score) in user_stats.iterrows():
+        buf.write(f"- {user}: {int(count)} leads (avg score: {avg_score:.1f})\n")
+    buf.write("\n")
+
+    # Intent breakdown
+    buf.write("LEAD INTENT BREAKDOWN:\n")
+    intent_stats = leads.groupby("Intent", observed=True)["LeadScore"].agg(["size", "mean"]).sort_values("size", ascending=False)
+    for intent, (count, avg_score) in intent_stats.iterrows():
+        buf.write(f"- {intent}: {int(count):,} leads (avg score: {avg_score:.1f})\n")
+    
+    # Objection analysis (if available)
+    if has_objection_data and 'objections' in leads.columns:
+        buf.write("\nOBJECTION ANALYSIS:\n")
+        all_objections = []
+        for _, row in leads.iterrows():
+            if 'objections' in row:
                 objections = eval(row['objections']) if isinstance(row['objections'], str) else row['objections']
                 if objections:
-                    objection_info = f" | Objections: {', '.join(objections)}"
-            
-            f.write(f"{i:2d}. {row['Username']} (Score: {row['LeadScore']}) - {row['LeadQuality']}\n")
-            f.write(f"    Intent: {row['Intent']} | Sentiment: {row['Sentiment']}{objection_info}\n")
-            f.write(f"    Comment: {str(row['Comment'])[:100]}...\n\n")
-        
-        # Top users by lead count
-        f.write("TOP 5 USERS BY LEAD COUNT:\n")
-        top_users = leads["Username"].value_counts().head(5)
-        for user, count in top_users.items():
-            avg_score = leads[leads["Username"] == user]["LeadScore"].mean()
-            f.write(f"- {user}: {count} leads (avg score: {avg_score:.1f})\n")
-        f.write("\n")
-        
-        # Intent breakdown
-        f.write("LEAD INTENT BREAKDOWN:\n")
-        intent_counts = leads["Intent"].value_counts()
-        for intent, count in intent_counts.items():
-            avg_score = leads[leads["Intent"] == intent]["LeadScore"].mean()
-            f.write(f"- {intent}: {count:,} leads (avg score: {avg_score:.1f})\n")
+                    all_objections.extend(objections)
         
-        # Objection analysis (if available)
-        if has_objection_data and 'objections' in leads.columns:
-            f.write("\nOBJECTION ANALYSIS:\n")
-            all_objections = []
-            for _, row in leads.iterrows():
-                if 'objections' in row:
-                    objections = eval(row['objections']) if isinstance(row['objections'], str) else row['objections']
-                    if objections:
-                        all_objections.extend(objections)
-            
-            if all_objections:
-                from collections import Counter
-                objection_counts = Counter(all_objections)
-                f.write("Top objections among leads:\n")
-                for objection, count in objection_counts.most_common(5):
-                    f.write(f"- {objection}: {count} mentions\n")
-            else:
-                f.write("No specific objections detected among leads.\n")
+        if all_objections:
+            from collections import Counter
+            objection_counts = Counter(all_objections)
+            buf.write("Top objections among leads:\n")
+            for objection, count in objection_counts.most_common(5):
+                buf.write(f"- {objection}: {count} mentions\n")
+        else:
+            buf.write("No specific objections detected among leads.\n")
+    
+    os.makedirs("reports", exist_ok=True)
+    Path(REPORT_TXT).write_text(buf.getvalue(), encoding="utf-8")
     
     print(f"Comprehensive lead summary report saved to {REPORT_TXT}")
     
@@ -2,12 +2,54 @@
 Centralized logging setup for YouTube EV Lead Generation Pipeline
 """
 
+import atexit
+import functools
 import logging
 import logging.config
+import logging.handlers
 import json
 import os
+import queue
+import sys
 from pathlib import Path
 
+# Background threads that write records queued by QueueHandlers, one per file handler
+_queue_listeners = []
+
+# Set once setup_logging() has run, so repeat calls don't stack handlers
+_configured = False
+
+def _stop_queue_listeners():
+    """Flush and stop the background log writers"""
+    while _queue_listeners:
+        _queue_listeners.pop().stop()
+
+atexit.register(_stop_queue_listeners)
+
+def _queue_file_handlers():
+    """
+    Swap every configured FileHandler for a QueueHandler, so logging calls only
+    enqueue the record; a QueueListener thread does the disk writes. Each file
+    handler gets its own queue and listener, and its QueueHandler goes exactly where
+    it was attached, so routing and propagation are unchanged.
+    """
+    _stop_queue_listeners()
+    
+    queue_handlers = {}  # file handler -> the QueueHandler standing in for it
+    loggers = [logging.getLogger()] + [
+        logger for logger in logging.Logger.manager.loggerDict.values() if isinstance(logger, logging.Logger)
+    ]
+    for logger in loggers:
+        for handler in [h for h in logger.handlers if isinstance(h, logging.FileHandler)]:
+            if handler not in queue_handlers:
+                log_queue = queue.SimpleQueue()
+                queue_handlers[handler] = logging.handlers.QueueHandler(log_queue)
+                listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+                listener.start()
+                _queue_listeners.append(listener)
+            # Same position in the handler list, so output order across handlers is kept
+            logger.handlers[logger.handlers.index(handler)] = queue_handlers[handler]
+
 def setup_logging(config_path: str = "config/logging_config.json", log_level: str = None):
     """
     Setup logging configuration for the entire pipeline
@@ -15,7 +57,14 @@ def setup_logging(config_path: str = "config/logging_config.json", log_level: st
     Args:
         config_path: Path to logging configuration file
         log_level: Override log level (DEBUG, INFO, WARNING, ERROR)
+    
+    Entry points call this once; later calls are no-ops.
     """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    
     # Ensure logs directory exists
     logs_dir = Path("logs")
     logs_dir.mkdir(exist_ok=True)
@@ -59,6 +108,8 @@ def setup_logging(config_path: str = "config/logging_config.json", log_level: st
             ]
         )
         logging.getLogger(__name__).warning(f"Logging config not found: {config_path}")
+    
+    _queue_file_handlers()
 
 def get_logger(name: str = None) -> logging.Logger:
     """
@@ -71,12 +122,13 @@ def get_logger(name: str = None) -> logging.Logger:
         Configured logger instance
     """
     if name is None:
-        # Get the calling module name
-        import inspect
-        frame = inspect.currentframe().f_back
-        name = frame.f_globals.get('__name__', 'unknown')
+        # Resolve the calling module once per call site
+        frame = sys._getframe(1)
+        return _logger_for_caller(frame.f_code, frame.f_globals.get('__name__', 'unknown'))
     
     return logging.getLogger(name)
 
-# Auto-setup logging when module is imported
-setup_logging()
\ No newline at end of file
+@functools.lru_cache(maxsize=256)
+def _logger_for_caller(code, module_name: str) -> logging.Logger:
+    """Logger for a get_logger() call site, keyed by the caller's code object"""
+    return logging.getLogger(module_name)
@@ -1,9 +1,38 @@
 import os
+import re
+import argparse
 import json
+import hashlib
+import functools
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+import numpy as np
 import pandas as pd
-import torch
-from transformers import pipeline
 from dotenv import load_dotenv
+from utils import data_loader, PLOTLY_INCLUDE_JS
+
+try:
+    import ahocorasick
+except ImportError:  # optional: fall back to per-category regex scans
+    ahocorasick = None
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"  # multithreaded CSV parser
+except ImportError:
+    CSV_ENGINE = "c"
+
+# Comment count from which keyword detection is split across a process pool
+KEYWORD_PARALLEL_MIN_ROWS = int(os.getenv('OBJECTION_PARALLEL_MIN_ROWS', 200_000))
+
+# Default transformer cap when the model runs as fp32 PyTorch on CPU
+CPU_FP32_MAX_TRANSFORMER_SAMPLES = 200
+
+# Zero-shot results kept in the on-disk cache; the least recently used are dropped beyond this
+OBJECTION_CACHE_MAX_ENTRIES = int(os.getenv('OBJECTION_CACHE_MAX_ENTRIES', 200_000))
+
+# Free-text columns are always read as strings (e.g. numeric-looking usernames)
+TEXT_COLUMN_DTYPES = {col: str for col in ['Username', 'Comment', 'Cleaned_Comment', 'Intent', 'Sentiment', 'VideoID']}
 
 def detect_keyword_objections(text, keyword_dict):
     objections = []
@@ -13,26 +42,125 @@ def detect_keyword_objections(text, keyword_dict):
             objections.append(obj)
     return objections
 
-def detect_transformer_objections_batch(texts, labels, classifier, threshold=0.4, batch_size=None):
-    """Optimized batch processing with adaptive batch sizing and GPU utilization"""
+def build_keyword_automaton(keyword_dict):
+    """
+    Build one Aho-Corasick automaton mapping every keyword to a bitmask of the
+    categories that use it (bit i = i-th category of keyword_dict)
+    """
+    automaton = ahocorasick.Automaton()
+    for bit, keywords in enumerate(keyword_dict.values()):
+        for kw in keywords:
+            kw = kw.lower()  # comments are lowercased before the scan
+            if kw:
+                automaton.add_word(kw, automaton.get(kw, 0) | (1 << bit))
+    automaton.make_automaton()
+    return automaton
+
+def detect_keyword_objections_vectorized(texts, keyword_dict, lowercase=True):
+    """
+    Vectorized, case-insensitive keyword objection detection over a whole Series of
+    comments; lowercase=False skips lowering texts that are already lowercase
+    """
+    texts = texts.fillna("").astype(str)
+    categories = list(keyword_dict.keys())
+
+    if ahocorasick is not None and any(keyword_dict.values()):
+        # Single linear pass per comment regardless of how many keywords there are
+        automaton = build_keyword_automaton(keyword_dict)
+        category_lists = {}  # bitmask -> categories in config order, decoded once per combination
+        results = []
+        for text in texts.tolist():
+            mask = 0
+            for _, bits in automaton.iter(text.lower() if lowercase else text):
+                mask |= bits
+            found = category_lists.get(mask)
+            if found is None:
+                found = category_lists[mask] = [cat for bit, cat in enumerate(categories) if mask >> bit & 1]
+            results.append(list(found))
+        return pd.Series(results, index=texts.index)
+
+    # Fallback: one IGNORECASE regex scan per category over the whole Series (no lowercased copy)
+    mask = np.column_stack([
+        texts.str.contains("|".join(re.escape(kw) for kw in keywords), flags=re.IGNORECASE, regex=True).to_numpy()
+        if keywords else np.zeros(len(texts), dtype=bool)
+        for keywords in keyword_dict.values()
+    ]) if categories else np.zeros((len(texts), 0), dtype=bool)
+    return pd.Series(
+        [[cat for cat, hit in zip(categories, row) if hit] for row in mask.tolist()],
+        index=texts.index
+    )
+
+def detect_keyword_objections_parallel(texts, keyword_dict, min_rows=KEYWORD_PARALLEL_MIN_ROWS, lowercase=True):
+    """
+    detect_keyword_objections_vectorized over one chunk per CPU in a joblib process
+    pool; below min_rows (or on one CPU) worker start-up costs more than it saves
+    """
+    n_jobs = os.cpu_count() or 1
+    if len(texts) < min_rows or n_jobs < 2:
+        return detect_keyword_objections_vectorized(texts, keyword_dict, lowercase=lowercase)
+    from joblib import Parallel, delayed
+    chunks = np.array_split(np.arange(len(texts)), n_jobs)
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(detect_keyword_objections_vectorized)(texts.iloc[chunk], keyword_dict, lowercase=lowercase) for chunk in chunks
+    )
+    return pd.concat(results)
+
+def estimate_token_lengths(texts, classifier):
+    """Token count per text using the pipeline's tokenizer, or word count as a fallback"""
+    tokenizer = getattr(classifier, "tokenizer", None)
+    if tokenizer is not None:
+        try:
+            return [len(ids) for ids in tokenizer([str(t) for t in texts], add_special_tokens=False)["input_ids"]]
+        except Exception:
+            pass
+    return [len(str(t).split()) for t in texts]
+
+def pack_by_token_budget(sorted_lengths, n_labels, max_tokens, max_batch_size=None):
+    """
+    Greedily group length-sorted texts so each padded batch stays within a token budget.
+    Yields (start, end) slices; a batch costs batch_len * longest_len * n_labels tokens.
+    """
+    start = 0
+    while start < len(sorted_lengths):
+        end = start + 1
+        while end < len(sorted_lengths):
+            if max_batch_size and end - start >= max_batch_size:
+                break
+            if (end - start + 1) * max(sorted_lengths[end], 1) * n_labels > max_tokens:
+                break
+            end += 1
+        yield start, end
+        start = end
+
+def detect_transformer_objections_batch(texts, labels, classifier, threshold=0.4, batch_size=None, max_tokens=None, multi_label=False):
+    """
+    Optimized batch processing with token-budget packing and GPU utilization.
+    multi_label scores every label independently (entailment vs contradiction)
+    instead of softmaxing across labels, so several objections can clear threshold
+    """
     if not texts:
         return []
     
-    # Adaptive batch sizing based on GPU availability and memory
-    if batch_size is None:
-        if torch.cuda.is_available():
-            batch_size = min(32, len(texts))  # Larger batches for GPU
-        else:
-            batch_size = min(16, len(texts))  # Smaller batches for CPU
+    # Token budget per forward pass, sized for GPU vs CPU memory
+    if max_tokens is None:
+        import torch
+        max_tokens = 32768 if torch.cuda.is_available() else 4096
     
+    # Length-bucket: sort by token count so each batch pads to a similar length
+    lengths = estimate_token_lengths(texts, classifier)
+    order = np.argsort(lengths, kind="stable")
+    sorted_texts = [texts[i] for i in order]
+    sorted_lengths = [lengths[i] for i in order]
+    batches = list(pack_by_token_budget(sorted_lengths, len(labels), max_tokens, batch_size))
+
     all_objections = []
     from tqdm import tqdm
     
-    for i in tqdm(range(0, len(texts), batch_size), desc="Processing objection batches"):
-        batch_texts = texts[i:i + batch_size]
+    for batch_num, (start, end) in enumerate(tqdm(batches, desc="Processing objection batches"), 1):
+        batch_texts = sorted_texts[start:end]
         try:
             # Process entire batch at once
-            results = classifier(batch_texts, labels, batch_size=len(batch_texts))
+            results = classifier(batch_texts, labels, batch_size=len(batch_texts), multi_label=multi_label)
             
             # Handle single text vs batch results
             if not isinstance(results, list):
@@ -47,12 +175,12 @@ def detect_transformer_objections_batch(texts, labels, classifier, threshold=0.4
                 all_objections.append(objections)
                 
         except Exception as e:
-            print(f"Batch processing failed for batch {i//batch_size + 1}, using fallback: {e}")
+            print(f"Batch processing failed for batch {batch_num}, using fallback: {e}")
             # Efficient fallback processing
             batch_objections = []
             for text in batch_texts:
                 try:
-                    single_result = classifier(str(text), labels)
+                    single_result = classifier(str(text), labels, multi_label=multi_label)
                     if isinstance(single_result, dict):
                         objections = [label for label, score in zip(single_result['labels'], single_result['scores']) if score >= threshold]
                     else:
@@ -63,12 +191,340 @@ def detect_transformer_objections_batch(texts, labels, classifier, threshold=0.4
                     batch_objections.append([])
             all_objections.extend(batch_objections)
     
-    return all_objections
+    # Restore the caller's order
+    results = [None] * len(texts)
+    for sorted_pos, original_pos in enumerate(order):
+        results[original_pos] = all_objections[sorted_pos]
+    return results
+
+def objection_cache_key(text, labels, threshold, model_name="", multi_label=False):
+    """Content hash for a (comment, model, label set, threshold, scoring mode) zero-shot result"""
+    payload = "\x1f".join([text, model_name, str(threshold), *labels, *(["multi_label"] if multi_label else [])])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def load_objection_cache(cache_path):
+    """Load the persisted zero-shot result cache (empty dict if missing or unreadable)"""
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable objection cache {cache_path}: {e}")
+    return {}
+
+def save_objection_cache(cache, cache_path, max_entries=OBJECTION_CACHE_MAX_ENTRIES):
+    """Persist the zero-shot result cache for the next run, keeping only the max_entries most recently used"""
+    if len(cache) > max_entries:
+        for key in list(cache)[:len(cache) - max_entries]:
+            del cache[key]
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, separators=(',', ':'))
+
+def detect_transformer_objections_cached(texts, labels, classifier, threshold=0.4, cache=None, multi_label=False):
+    """Run the zero-shot classifier only on unique comments not already in the cache"""
+    if cache is None:
+        cache = {}
+    model_name = getattr(classifier, "model_name", None) or getattr(getattr(classifier, "model", None), "name_or_path", "")
+    keys = [objection_cache_key(text, labels, threshold, model_name, multi_label) for text in texts]
+
+    # Unique uncached texts, in first-seen order; cache hits move to the end (most recently used)
+    pending = {}
+    for text, key in zip(texts, keys):
+        if key in cache:
+            cache[key] = cache.pop(key)
+        elif key not in pending:
+            pending[key] = text
+
+    if pending:
+        print(f"Running zero-shot classifier on {len(pending)} unique uncached comments (of {len(texts)})")
+        if isinstance(classifier, RemoteObjectionClassifier):
+            results = classifier.classify(list(pending.values()), labels, threshold=threshold, multi_label=multi_label)
+        else:
+            results = detect_transformer_objections_batch(
+                list(pending.values()), labels, classifier, threshold=threshold, multi_label=multi_label
+            )
+        cache.update(zip(pending.keys(), results))
+
+    return [cache[key] for key in keys]
+
+class PretokenizedZeroShotClassifier:
+    """
+    Drop-in replacement for the zero-shot pipeline call that tokenizes each premise
+    and each label hypothesis once, then assembles the (premise, hypothesis) pairs
+    from token ids instead of re-tokenizing every pair. The model still encodes
+    every pair: in an NLI cross-encoder the premise attends to the hypothesis.
+    """
+
+    def __init__(self, model, tokenizer, hypothesis_template="This example is {}."):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.hypothesis_template = hypothesis_template
+        self._hypothesis_ids = {}
+        self.entailment_id = next(
+            (idx for label, idx in model.config.label2id.items() if label.lower().startswith("entail")), -1
+        )
+        self.contradiction_id = -1 if self.entailment_id == 0 else 0
+        self.pair_template = self._pair_template(tokenizer)
+
+    @staticmethod
+    def _pair_template(tokenizer):
+        """
+        Special tokens the tokenizer puts around a pair, read off one probe encoding
+        so pairs are plain list concatenation: prefix + premise + middle + hypothesis
+        + suffix. Token type ids (if the model uses them) are kept per part.
+        The probe goes through tokenizer(), whose post-processor knows the layout;
+        build_inputs_with_special_tokens is a bare concatenation on generic fast tokenizers.
+        """
+        first = tokenizer.encode("a", add_special_tokens=False)
+        second = tokenizer.encode("b", add_special_tokens=False)
+        probe = tokenizer("a", "b")
+        ids = probe["input_ids"]
+        start = next(i for i in range(len(ids)) if ids[i:i + len(first)] == first)
+        middle_start = start + len(first)
+        second_start = next(i for i in range(middle_start, len(ids)) if ids[i:i + len(second)] == second)
+        suffix_start = second_start + len(second)
+        template = {
+            "prefix": ids[:start], "middle": ids[middle_start:second_start], "suffix": ids[suffix_start:],
+        }
+        types = probe.get("token_type_ids")
+        if types is not None:
+            template["types"] = (
+                types[:start], types[start], types[middle_start:second_start], types[second_start], types[suffix_start:]
+            )
+        return template
+
+    @classmethod
+    def from_pipeline(cls, zero_shot_pipeline):
+        return cls(zero_shot_pipeline.model, zero_shot_pipeline.tokenizer)
+
+    def hypothesis_ids(self, labels):
+        """Token ids for each label's hypothesis, tokenized once per label set"""
+        key = tuple(labels)
+        if key not in self._hypothesis_ids:
+            self._hypothesis_ids[key] = [
+                self.tokenizer.encode(self.hypothesis_template.format(label), add_special_tokens=False)
+                for label in labels
+            ]
+        return self._hypothesis_ids[key]
+
+    def pair_features(self, premise, hypothesis, hypothesis_tail):
+        """Model inputs for one (premise, hypothesis) pair; the premise is truncated if the pair is too long"""
+        template = self.pair_template
+        overflow = (
+            len(template["prefix"]) + len(premise) + len(template["middle"]) + len(hypothesis_tail)
+            - self.tokenizer.model_max_length
+        )
+        if overflow > 0:
+            premise = premise[:max(len(premise) - overflow, 0)]
+        head = template["prefix"] + premise + template["middle"]
+        features = {"input_ids": head + hypothesis_tail}
+        if "types" in template:
+            prefix_types, premise_type, middle_types, hypothesis_type, suffix_types = template["types"]
+            features["token_type_ids"] = (
+                prefix_types + [premise_type] * len(premise) + middle_types
+                + [hypothesis_type] * len(hypothesis) + suffix_types
+            )
+        return features
+
+    def __call__(self, texts, labels, batch_size=None, multi_label=False):
+        import torch
+        single = isinstance(texts, str)
+        texts = [texts] if single else [str(t) for t in texts]
+        hypotheses = self.hypothesis_ids(labels)
+        premises = self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+
+        hypothesis_tails = [hypothesis + self.pair_template["suffix"] for hypothesis in hypotheses]
+        features = [
+            self.pair_features(premise, hypothesis, tail)
+            for premise in premises for hypothesis, tail in zip(hypotheses, hypothesis_tails)
+        ]
+        inputs = self.tokenizer.pad(features, return_tensors="pt").to(self.model.device)
+        # inference_mode also skips autograd's version-counter bookkeeping that no_grad keeps
+        with torch.inference_mode():
+            logits = self.model(**inputs).logits.float().cpu().numpy()
+        logits = logits.reshape(len(texts), len(labels), -1)
+
+        if multi_label or len(labels) == 1:
+            pair = logits[..., [self.contradiction_id, self.entailment_id]]
+            scores = np.exp(pair) / np.exp(pair).sum(-1, keepdims=True)
+            scores = scores[..., 1]
+        else:
+            entail = logits[..., self.entailment_id]
+            scores = np.exp(entail) / np.exp(entail).sum(-1, keepdims=True)
 
-def combine_objections(row):
-    return list(set(row['objection_keywords']) | set(row['objection_transformer']))
+        results = []
+        for text, text_scores in zip(texts, scores):
+            ranked = np.argsort(-text_scores, kind="stable")
+            results.append({
+                "sequence": text,
+                "labels": [labels[j] for j in ranked],
+                "scores": text_scores[ranked].tolist()
+            })
+        return results[0] if single else results
 
-def main():
+def build_objection_classifier(model_name, onnx_model_dir=None):
+    """
+    Create the zero-shot classifier.
+
+    On CPU, an int8-quantized ONNX export is used when one exists at onnx_model_dir
+    and optimum[onnxruntime] is installed. Build it once with:
+
+        optimum-cli export onnx --model <model_name> --task zero-shot-classification <dir>-fp32
+        optimum-cli onnxruntime quantize --onnx_model <dir>-fp32 --avx512_vnni -o <dir>
+    """
+    import torch
+    from transformers import pipeline
+
+    if torch.cuda.is_available():
+        # TF32 tensor-core matmuls for any fp32 work; cuDNN picks the fastest kernels
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.benchmark = True
+        torch.set_float32_matmul_precision('high')
+
+        # Half-precision weights: bf16 on Ampere and newer, fp16 on older tensor-core GPUs
+        use_bf16 = torch.cuda.is_bf16_supported()
+        classifier = pipeline(
+            "zero-shot-classification",
+            model=model_name,
+            device=0,
+            torch_dtype=torch.bfloat16 if use_bf16 else torch.float16,
+            model_kwargs={"low_cpu_mem_usage": True},
+            batch_size=128
+        )
+        if os.getenv('OBJECTION_TORCH_COMPILE', '1') == '1':
+            try:
+                # dynamic shapes: token-budget batches vary in both batch size and padded length
+                classifier.model = torch.compile(classifier.model, dynamic=True, fullgraph=False)
+                classifier("warm up the compiled graph", ["price", "range"])
+            except Exception as e:
+                print(f"torch.compile unavailable, running eager: {e}")
+                classifier.model = getattr(classifier.model, "_orig_mod", classifier.model)
+        return classifier
+
+    if onnx_model_dir and os.path.isdir(onnx_model_dir):
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+            from transformers import AutoTokenizer
+            print(f"Using int8 ONNX Runtime model from {onnx_model_dir}")
+            return pipeline(
+                "zero-shot-classification",
+                model=ORTModelForSequenceClassification.from_pretrained(onnx_model_dir),
+                tokenizer=AutoTokenizer.from_pretrained(onnx_model_dir),
+                batch_size=16
+            )
+        except ImportError:
+            print("optimum[onnxruntime] not installed; using the PyTorch model on CPU")
+
+    # torch defaults to the physical core count; use every logical CPU unless told otherwise
+    torch.set_num_threads(int(os.getenv("OBJECTION_NUM_THREADS", os.cpu_count() or 1)))
+    return pipeline("zero-shot-classification", model=model_name, device=-1, batch_size=16)
+
+@functools.lru_cache(maxsize=1)
+def get_objection_classifier(model_name, onnx_model_dir=None):
+    """
+    The pretokenizing zero-shot classifier, built once per process: repeated
+    main() calls (notebooks, the worker) reuse the loaded model and its hypothesis ids
+    """
+    return PretokenizedZeroShotClassifier.from_pipeline(build_objection_classifier(model_name, onnx_model_dir))
+
+def classifier_backend(classifier):
+    """'torch-cpu', 'torch-cuda', 'onnx', or for a worker client the backend the worker reported"""
+    if isinstance(classifier, RemoteObjectionClassifier):
+        return classifier.backend
+    model = getattr(classifier, "model", None)
+    if model is None:
+        return "unknown"
+    import torch
+    if not isinstance(model, torch.nn.Module):
+        return "onnx"  # ONNX Runtime model
+    return f"torch-{next(model.parameters()).device.type}"
+
+def runs_torch_on_cpu(classifier):
+    """True when the model (in-process or in the worker) is fp32 PyTorch on CPU"""
+    return classifier_backend(classifier) == "torch-cpu"
+
+def limit_transformer_comments(comments, classifier, max_samples=None):
+    """
+    Sample the comments down to max_samples. No cap by default on the GPU and ONNX backends;
+    fp32 PyTorch on CPU, in-process or in the worker, runs every (comment, label) pair through the
+    395M-parameter ModernBERT-large, so it keeps the CPU cap unless MAX_TRANSFORMER_SAMPLES says otherwise
+    """
+    if max_samples is None and runs_torch_on_cpu(classifier):
+        max_samples = CPU_FP32_MAX_TRANSFORMER_SAMPLES
+        print("fp32 PyTorch model on CPU: set MAX_TRANSFORMER_SAMPLES=0 to analyse every comment")
+    if max_samples and len(comments) > max_samples:
+        comments = comments.sample(n=max_samples, random_state=42)
+        print(f"Limited transformer analysis to {max_samples} samples")
+    return comments
+
+def parse_worker_address(address):
+    """'host:port' -> (host, port) for multiprocessing.connection"""
+    host, _, port = address.rpartition(":")
+    return (host or "localhost", int(port))
+
+class RemoteObjectionClassifier:
+    """Client for a running objection_worker.py, which keeps the model loaded between runs"""
+
+    def __init__(self, address, authkey):
+        self.conn = Client(parse_worker_address(address), authkey=authkey)
+        handshake = self._request({"op": "model_name"})
+        self.model_name = handshake["model_name"]
+        self.backend = handshake.get("backend", "unknown")
+
+    def _request(self, message):
+        self.conn.send(message)
+        response = self.conn.recv()
+        if "error" in response:
+            raise RuntimeError(f"Objection worker error: {response['error']}")
+        return response
+
+    def classify(self, texts, labels, threshold=0.4, multi_label=False):
+        return self._request({
+            "op": "classify", "texts": texts, "labels": labels, "threshold": threshold, "multi_label": multi_label
+        })["objections"]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def connect_objection_worker(address, authkey):
+    """Connect to a running objection worker, or None if it isn't reachable or rejects the authkey"""
+    if not authkey:
+        print(f"OBJECTION_WORKER_AUTHKEY is not set; not connecting to the objection worker at {address}")
+        return None
+    try:
+        return RemoteObjectionClassifier(address, authkey)
+    except (ConnectionRefusedError, OSError, AuthenticationError, EOFError) as e:
+        print(f"Objection worker at {address} not usable ({e!r}); loading the model in-process")
+        return None
+
+def combine_objections_vectorized(keyword_objections, transformer_objections):
+    """Union of keyword and transformer objections per row, without a per-row DataFrame.apply"""
+    return [
+        list(dict.fromkeys([*kw, *tf]))
+        for kw, tf in zip(keyword_objections.to_numpy(), transformer_objections.to_numpy())
+    ]
+
+def format_list_column(values):
+    """repr() each distinct list once; objection lists repeat the same few combinations"""
+    formatted = {}
+    out = []
+    for v in values:
+        key = tuple(v)
+        text = formatted.get(key)
+        if text is None:
+            text = formatted[key] = repr(list(key))
+        out.append(text)
+    return out
+
+def main(fast=False):
+    """Run the objection analysis; fast caps transformer analysis at 500 (GPU) / 200 (CPU) sampled comments"""
     # Load environment variables - use relative path that works in both environments
     load_dotenv(dotenv_path='config/.env')
 
@@ -76,11 +532,15 @@ def main():
     OBJECTION_CONFIG_PATH = os.getenv('OBJECTION_KEYWORDS_PATH', 'config/objection_keywords.json')
     DATA_PATH = os.getenv('ENRICHED_COMMENTS_PATH', 'data/comments_data_enriched.csv')
     OUTPUT_PATH = os.getenv('OBJECTION_OUTPUT_PATH', 'data/objection_analysis.csv')
+    PARQUET_OUTPUT_PATH = os.getenv('OBJECTION_PARQUET_PATH', os.path.splitext(OUTPUT_PATH)[0] + '.parquet')
+    CACHE_PATH = os.getenv('OBJECTION_CACHE_PATH', 'data/.objection_cache.json')
+    # Score each objection label on its own against the 0.4 threshold (0: softmax across labels)
+    MULTI_LABEL = os.getenv('OBJECTION_MULTI_LABEL', '1') == '1'
 
     print("Script started")
 
     # 1. Load data
-    df = pd.read_csv(DATA_PATH)
+    df = data_loader.load_table(DATA_PATH, engine=CSV_ENGINE, dtype=TEXT_COLUMN_DTYPES)
     print(f"Loaded data columns: {list(df.columns)}")
 
     COMMENT_COL = os.getenv('COMMENT_TEXT_COL', 'Cleaned_Comment')
@@ -94,59 +554,94 @@ def main():
         objection_keywords = json.load(f)
 
     # 3. Keyword-based objection detection and initialize transformer column
-    df['objection_keywords'] = df[COMMENT_COL].apply(lambda x: detect_keyword_objections(str(x), objection_keywords))
+    # data_preprocessing.py already lowercases Cleaned_Comment, so the scan need not lower it again
+    df['objection_keywords'] = detect_keyword_objections_parallel(
+        df[COMMENT_COL], objection_keywords, lowercase=COMMENT_COL != 'Cleaned_Comment'
+    )
     df['objection_transformer'] = [[] for _ in range(len(df))]  # Initialize with empty lists
 
     # 3.5. Filter comments that need transformer analysis (only those without keyword objections)
     comments_needing_transformer = df[df['objection_keywords'].apply(len) == 0]
     print(f"Found {len(comments_needing_transformer)} comments needing transformer analysis (out of {len(df)} total)")
     
-    # 3.6. Adaptive transformer analysis limits based on system capabilities
-    if torch.cuda.is_available():
-        max_transformer_samples = 500  # Higher limit with GPU
+    # 3.6. Optional cap on transformer analysis: MAX_TRANSFORMER_SAMPLES (0 = no cap),
+    # or --fast for quick dev loops (500 with GPU, 200 on CPU)
+    max_transformer_samples = os.getenv('MAX_TRANSFORMER_SAMPLES')
+    if max_transformer_samples:
+        max_transformer_samples = int(max_transformer_samples)
+    elif fast:
+        import torch
+        max_transformer_samples = 500 if torch.cuda.is_available() else 200
     else:
-        max_transformer_samples = 200  # Conservative limit for CPU
-        
-    if len(comments_needing_transformer) > max_transformer_samples:
-        comments_needing_transformer = comments_needing_transformer.sample(n=max_transformer_samples, random_state=42)
-        print(f"Limited transformer analysis to {max_transformer_samples} samples (GPU: {'✅' if torch.cuda.is_available() else '❌'})")
-
-    # 4. Optimized transformer-based objection detection with model persistence
-    print("Initializing transformer model with GPU support...")
-    classifier = pipeline(
-        "zero-shot-classification",
-        model="valhalla/distilbart-mnli-12-1",
-        device=0 if torch.cuda.is_available() else -1,
-        batch_size=32 if torch.cuda.is_available() else 16
-    )
-    candidate_labels = list(objection_keywords.keys())
-    
-    # Process with optimized batching
+        max_transformer_samples = None
+
+    # 4. Transformer-based objection detection; torch/transformers are only imported
+    # (and the model only loaded) when some comments actually need it
     if len(comments_needing_transformer) > 0:
-        print(f"Processing {len(comments_needing_transformer)} comments with optimized batch processing...")
-        texts = comments_needing_transformer[COMMENT_COL].astype(str).tolist()
-        transformer_objections = detect_transformer_objections_batch(
-            texts, candidate_labels, classifier, threshold=0.4
+        # A running objection_worker.py (OBJECTION_WORKER_ADDRESS) skips the model load
+        WORKER_ADDRESS = os.getenv('OBJECTION_WORKER_ADDRESS')
+        WORKER_AUTHKEY = os.getenv('OBJECTION_WORKER_AUTHKEY', '').encode()
+        OBJECTION_MODEL = os.getenv('OBJECTION_MODEL', 'MoritzLaurer/ModernBERT-large-zeroshot-v2.0')
+        ONNX_MODEL_DIR = os.getenv('OBJECTION_ONNX_MODEL_DIR', 'models/objection-zeroshot-int8')
+        classifier = connect_objection_worker(WORKER_ADDRESS, WORKER_AUTHKEY) if WORKER_ADDRESS else None
+        if classifier is None:
+            print("Initializing transformer model with GPU support...")
+            classifier = get_objection_classifier(OBJECTION_MODEL, ONNX_MODEL_DIR)
+        else:
+            print(f"Using objection worker at {WORKER_ADDRESS} ({classifier.model_name}, {classifier.backend})")
+
+        comments_needing_transformer = limit_transformer_comments(
+            comments_needing_transformer, classifier, max_transformer_samples
         )
+        candidate_labels = list(objection_keywords.keys())
         
-        # Update only the comments that needed transformer analysis (handle variable list lengths)        
-        for idx, objections in zip(comments_needing_transformer.index, transformer_objections):
-            df.at[idx, 'objection_transformer'] = objections
+        print(f"Processing {len(comments_needing_transformer)} comments with optimized batch processing...")
+        texts = comments_needing_transformer[COMMENT_COL].astype(str).tolist()
+        objection_cache = load_objection_cache(CACHE_PATH)
+        try:
+            transformer_objections = detect_transformer_objections_cached(
+                texts, candidate_labels, classifier, threshold=0.4, cache=objection_cache, multi_label=MULTI_LABEL
+            )
+        except (EOFError, OSError, RuntimeError) as e:
+            if not isinstance(classifier, RemoteObjectionClassifier):
+                raise
+            # The worker died or failed mid-run: the in-process model can still do the batch
+            print(f"Objection worker at {WORKER_ADDRESS} failed ({e!r}); loading the model in-process")
+            classifier.close()
+            classifier = get_objection_classifier(OBJECTION_MODEL, ONNX_MODEL_DIR)
+            comments_needing_transformer = limit_transformer_comments(
+                comments_needing_transformer, classifier, max_transformer_samples
+            )
+            texts = comments_needing_transformer[COMMENT_COL].astype(str).tolist()
+            transformer_objections = detect_transformer_objections_cached(
+                texts, candidate_labels, classifier, threshold=0.4, cache=objection_cache, multi_label=MULTI_LABEL
+            )
+        finally:
+            if isinstance(classifier, RemoteObjectionClassifier):
+                classifier.close()
+        save_objection_cache(objection_cache, CACHE_PATH)
         
-        # For comments not processed by transformer, use empty lists
-        remaining_comments = df[~df.index.isin(comments_needing_transformer.index)]
-        for idx in remaining_comments.index:
-            df.at[idx, 'objection_transformer'] = []
+        # Scatter results into a pre-filled object array and assign the column once;
+        # comments not processed by the transformer keep their empty lists
+        transformer_col = np.empty(len(df), dtype=object)
+        transformer_col[:] = [[] for _ in range(len(df))]
+        positions = df.index.get_indexer(comments_needing_transformer.index)
+        for pos, objections in zip(positions, transformer_objections):
+            transformer_col[pos] = objections
+        df['objection_transformer'] = transformer_col
     else:
         print("No comments need transformer analysis - all objections found via keywords")
-        for idx in df.index:
-            df.at[idx, 'objection_transformer'] = []
 
     # 5. Combine and deduplicate objections
-    df['objections'] = df.apply(combine_objections, axis=1)
+    df['objections'] = combine_objections_vectorized(df['objection_keywords'], df['objection_transformer'])
 
-    # 6. Save results
-    df.to_csv(OUTPUT_PATH, index=False)
+    # 6. Save results: Parquet keeps the list columns native; the CSV stays for
+    # existing readers, with list reprs formatted once per distinct combination
+    if CSV_ENGINE == "pyarrow":
+        df.to_parquet(PARQUET_OUTPUT_PATH, index=False, compression='zstd')
+        print(f"Parquet copy saved to {PARQUET_OUTPUT_PATH}")
+    list_columns = ['objection_keywords', 'objection_transformer', 'objections']
+    df.assign(**{col: format_list_column(df[col]) for col in list_columns}).to_csv(OUTPUT_PATH, index=False)
     print(f"Objection analysis complete. Results saved to {OUTPUT_PATH}")
 
     # 7. (Optional) Aggregate and visualize objection trends
@@ -162,10 +657,14 @@ def main():
             labels={'x': 'Objection/Barrier', 'y': 'Count'},
             title='Top Objections/Barriers in YouTube Comments'
         )
-        fig.write_html('visualizations/objection_trends.html')
+        fig.write_html('visualizations/objection_trends.html', include_plotlyjs=PLOTLY_INCLUDE_JS)
         print("Objection trends visualization saved to visualizations/objection_trends.html")
     except Exception as e:
         print(f"Visualization skipped: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Customer objection analysis")
+    parser.add_argument("--fast", action="store_true",
+                        help="cap transformer analysis at 500 (GPU) / 200 (CPU) sampled comments")
+    args = parser.parse_args()
+    main(fast=args.fast)
\ No newline at end of file
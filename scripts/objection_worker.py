@@ -0,0 +1,84 @@
+"""
+Long-lived zero-shot objection classifier.
+
+Loads the model once and serves classification requests over a local
+multiprocessing connection, so repeated objection_analysis.py runs skip the
+model load and CUDA initialization:
+
+    OBJECTION_WORKER_AUTHKEY=<secret> uv run scripts/objection_worker.py
+    OBJECTION_WORKER_AUTHKEY=<secret> OBJECTION_WORKER_ADDRESS=localhost:6010 uv run scripts/objection_analysis.py
+
+Connections carry pickled requests, so the worker refuses to start without
+an OBJECTION_WORKER_AUTHKEY shared with its clients.
+"""
+import os
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+from dotenv import load_dotenv
+from objection_analysis import (
+    classifier_backend,
+    detect_transformer_objections_batch,
+    get_objection_classifier,
+    parse_worker_address,
+)
+
+def handle_request(request, classifier, model_name, backend):
+    """Response for one client request"""
+    try:
+        if request.get("op") == "model_name":
+            return {"model_name": model_name, "backend": backend}
+        if request.get("op") == "classify":
+            objections = detect_transformer_objections_batch(
+                request["texts"], request["labels"], classifier, threshold=request.get("threshold", 0.4),
+                multi_label=request.get("multi_label", False)
+            )
+            return {"objections": objections}
+        return {"error": f"unknown op {request.get('op')!r}"}
+    except Exception as e:
+        return {"error": str(e)}
+
+def handle_connection(conn, classifier, model_name, backend):
+    """Serve requests on one client connection until it disconnects or the connection breaks"""
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        response = handle_request(request, classifier, model_name, backend)
+        try:
+            conn.send(response)
+        except (EOFError, OSError) as e:
+            print(f"Dropped objection worker client: {e}")
+            return
+
+def main():
+    load_dotenv(dotenv_path='config/.env')
+
+    address = parse_worker_address(os.getenv('OBJECTION_WORKER_ADDRESS', 'localhost:6010'))
+    authkey = os.getenv('OBJECTION_WORKER_AUTHKEY')
+    if not authkey:
+        print("ERROR: OBJECTION_WORKER_AUTHKEY is not set; refusing to serve an unauthenticated worker")
+        exit(1)
+    authkey = authkey.encode()
+    model_name = os.getenv('OBJECTION_MODEL', 'MoritzLaurer/ModernBERT-large-zeroshot-v2.0')
+    onnx_model_dir = os.getenv('OBJECTION_ONNX_MODEL_DIR', 'models/objection-zeroshot-int8')
+
+    print("Loading zero-shot classifier...")
+    classifier = get_objection_classifier(model_name, onnx_model_dir)
+    model_name = getattr(classifier.model, "name_or_path", model_name)
+    # Reported to clients, which cap the sample size when the model is fp32 PyTorch on CPU
+    backend = classifier_backend(classifier)
+
+    with Listener(address, authkey=authkey) as listener:
+        print(f"Objection worker listening on {address[0]}:{address[1]} ({backend})")
+        while True:
+            try:
+                conn = listener.accept()
+            except AuthenticationError as e:
+                print(f"Rejected objection worker client: {e}")
+                continue
+            with conn:
+                handle_connection(conn, classifier, model_name, backend)
+
+if __name__ == "__main__":
+    main()
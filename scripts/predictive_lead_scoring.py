@@ -1,76 +1,287 @@
 import pandas as pd
 import numpy as np
 import os
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, roc_auc_score
-import joblib
+import re
+import hashlib
 from datetime import datetime
+from utils import data_loader
+
+try:
+    import hyperscan
+except ImportError:  # optional: fall back to the combined-regex scan
+    hyperscan = None
+
+try:
+    from numba import njit
+except ImportError:  # optional: fall back to np.logical_or.reduceat
+    njit = None
+
+try:
+    import polars as pl
+except ImportError:  # optional: fall back to the pandas/numpy signal derivation
+    pl = None
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"  # multithreaded CSV parser
+except ImportError:
+    CSV_ENGINE = "c"
 
 ENRICHED_CSV = "data/comments_data_enriched.csv"
 LEADS_CSV = "data/leads.csv"
 PREDICTED_LEADS_CSV = "data/leads_predicted.csv"
 MODEL_PATH = "models/lead_conversion_model.pkl"
+MODEL_HASH_PATH = MODEL_PATH + ".hash"  # training-data hash of the saved model
+FEATURE_IMPORTANCE_CSV = "models/feature_importances.csv"  # read by the visualizations instead of the model
+
+# Free-text columns are always read as strings (e.g. numeric-looking usernames), Arrow-backed
+# when pyarrow is available so the .str scans run on contiguous UTF-8 buffers
+TEXT_DTYPE = "string[pyarrow]" if CSV_ENGINE == "pyarrow" else str
+TEXT_COLUMN_DTYPES = {col: TEXT_DTYPE for col in ['Username', 'Comment', 'Sentiment', 'Intent', 'LeadQuality', 'objections']}
+# Lead scores are multiples of 0.5, exact in float32
+LEADS_CSV_DTYPES = {**TEXT_COLUMN_DTYPES, 'LeadScore': 'float32'}
+
+# "hist_gradient_boosting" (default) or "random_forest"
+MODEL_TYPE = os.getenv("LEAD_MODEL_TYPE", "hist_gradient_boosting")
+
+# Keyword groups behind the behavioral conversion signals
+CONVERSION_PATTERNS = {
+    'purchase': r'\b(?:buy|purchase|order|reserve|reservation|buying|bought|ordered)\b',
+    'timeline': r'\b(?:soon|next month|this year|202[4-9]|waiting|delivery)\b',
+    'model': r'\b(?:r1t|r1s|r2|r3|rivian truck|rivian suv)\b',
+    'financial': r'\b(?:afford|financing|lease|payment|price|cost|budget)\b',
+    'practical': r'\b(?:delivery|warranty|service|charging|range|features|options)\b'
+}
+# Score weights for: purchase, timeline, model, financial, practical keyword groups,
+# repeat commenter, long comment, positive purchase intent
+CONVERSION_SIGNAL_WEIGHTS = np.array([3, 2, 1.5, 1, 1, 1, 0.5, 2], dtype=np.float32)
+COMPILED_CONVERSION_PATTERNS = {name: re.compile(pattern) for name, pattern in CONVERSION_PATTERNS.items()}
+# One alternation over every group's keywords, so each comment is scanned once
+COMBINED_CONVERSION_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(pattern[len(r'\b(?:'):-len(r')\b')] for pattern in CONVERSION_PATTERNS.values()) + r')\b'
+)
+
+# ML keyword features; every keyword is also in COMBINED_CONVERSION_PATTERN, so they
+# are resolved from the same scan (purchase here excludes 'reservation')
+FEATURE_KEYWORD_PATTERNS = {
+    'has_purchase_keywords': re.compile(r'\b(?:buy|purchase|order|reserve|buying|bought|ordered)\b'),
+    'has_timeline_urgency': COMPILED_CONVERSION_PATTERNS['timeline'],
+    'discusses_financials': COMPILED_CONVERSION_PATTERNS['financial']
+}
+
+if njit is not None:
+    @njit(cache=True, nogil=True)
+    def _or_keyword_groups(rows, token_codes, token_groups, hits):
+        """OR each matched keyword's group memberships into its comment's row"""
+        for i in range(rows.shape[0]):
+            for j in range(token_groups.shape[1]):
+                if token_groups[token_codes[i], j]:
+                    hits[rows[i], j] = True
+
+def match_conversion_patterns(comments_lower, group_patterns=None):
+    """
+    Boolean match per keyword group from a single regex scan of the lowercased comments.
+    Matched keywords are mapped back to every group they belong to (e.g. 'delivery').
+    group_patterns defaults to the conversion groups; any extra groups must only use
+    keywords from COMBINED_CONVERSION_PATTERN.
+    """
+    if group_patterns is None:
+        group_patterns = COMPILED_CONVERSION_PATTERNS
+    if hyperscan is None:
+        return match_patterns_re(comments_lower, group_patterns)
+    
+    # Hyperscan's \b only counts ASCII letters as word characters ('costé' would match
+    # 'cost'), so comments with any other character go through re to get identical results
+    ascii_rows = np.array([text.isascii() for text in comments_lower.tolist()], dtype=bool)
+    if ascii_rows.all():
+        return match_patterns_hyperscan(comments_lower, group_patterns)
+    hyperscan_hits = match_patterns_hyperscan(comments_lower[ascii_rows], group_patterns)
+    re_hits = match_patterns_re(comments_lower[~ascii_rows], group_patterns)
+    hits = {}
+    for name in group_patterns:
+        column = np.empty(len(comments_lower), dtype=bool)
+        column[ascii_rows] = hyperscan_hits[name].to_numpy()
+        column[~ascii_rows] = re_hits[name].to_numpy()
+        hits[name] = pd.Series(column, index=comments_lower.index)
+    return hits
+
+def match_patterns_re(comments_lower, group_patterns):
+    """Boolean match per keyword group from one combined-regex scan and a keyword -> group table"""
+    tokens = comments_lower.reset_index(drop=True).str.findall(COMBINED_CONVERSION_PATTERN).explode().dropna()
+    token_codes, unique_tokens = pd.factorize(tokens)
+    
+    # (distinct keyword x group) membership table, resolved once per keyword
+    token_groups = np.array(
+        [[bool(regex.fullmatch(tok)) for regex in group_patterns.values()] for tok in unique_tokens], dtype=bool
+    ).reshape(len(unique_tokens), len(group_patterns))
+    
+    # OR the memberships of each comment's keywords; exploded rows are grouped by comment
+    hits = np.zeros((len(comments_lower), len(group_patterns)), dtype=bool)
+    rows = tokens.index.to_numpy()
+    if njit is not None:
+        # Compiled integer loop; no (keyword hit x group) temporary
+        _or_keyword_groups(rows, token_codes, token_groups, hits)
+    elif len(rows):
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        hits[rows[starts]] = np.logical_or.reduceat(token_groups[token_codes], starts, axis=0)
+    return {name: pd.Series(hits[:, j], index=comments_lower.index) for j, name in enumerate(group_patterns)}
+
+def build_hyperscan_database(group_patterns):
+    """Compile every keyword group into one Hyperscan block-mode database (id = group position)"""
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[regex.pattern.encode("utf-8") for regex in group_patterns.values()],
+        ids=list(range(len(group_patterns))),
+        elements=len(group_patterns),
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8] * len(group_patterns)
+    )
+    return database
+
+def match_patterns_hyperscan(comments_lower, group_patterns):
+    """Boolean match per keyword group, all groups matched in one SIMD pass per comment"""
+    database = build_hyperscan_database(group_patterns)
+    hits = np.zeros((len(comments_lower), len(group_patterns)), dtype=bool)
+
+    def on_match(group_id, start, end, flags, row):
+        hits[row, group_id] = True
+
+    for row, text in enumerate(comments_lower.tolist()):
+        if text:
+            database.scan(text.encode("utf-8"), match_event_handler=on_match, context=row)
+    return {name: pd.Series(hits[:, j], index=comments_lower.index) for j, name in enumerate(group_patterns)}
+
+def build_classifier(model_type=MODEL_TYPE):
+    """Create the conversion classifier; both options fit in parallel across cores"""
+    from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+    if model_type == "hist_gradient_boosting":
+        # Features are binned once into uint8 histograms; early stopping kicks in on large data
+        return HistGradientBoostingClassifier(
+            max_iter=200, learning_rate=0.05, max_bins=255, early_stopping='auto',
+            class_weight='balanced', random_state=42
+        )
+    return RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced', n_jobs=-1, max_features='sqrt')
+
+def training_data_hash(X, y, feature_names, model_type=MODEL_TYPE):
+    """
+    Fingerprint of everything the saved model depends on: training matrix, labels, feature
+    columns, model type, classifier hyperparameters and the scikit-learn version
+    """
+    import sklearn
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{model_type}:{X.shape}:{sklearn.__version__}".encode())
+    digest.update(repr(list(feature_names)).encode())
+    digest.update(repr(sorted(build_classifier(model_type).get_params().items())).encode())
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(np.asarray(y, dtype=np.int8).tobytes())
+    return digest.hexdigest()
+
+def load_cached_model(data_hash):
+    """The saved model if it was trained on identical data, else None"""
+    import joblib
+    if not (os.path.exists(MODEL_PATH) and os.path.exists(MODEL_HASH_PATH)):
+        return None
+    with open(MODEL_HASH_PATH) as f:
+        if f.read().strip() != data_hash:
+            return None
+    try:
+        return joblib.load(MODEL_PATH)
+    except Exception as e:
+        print(f"Ignoring unreadable cached model {MODEL_PATH}: {e}")
+        return None
+
+def predict_unique_rows(clf, X):
+    """Conversion probabilities, scoring each distinct feature row once"""
+    unique_rows, inverse = np.unique(X, axis=0, return_inverse=True)
+    return clf.predict_proba(unique_rows)[:, 1][inverse.ravel()]
+
+def derive_comment_signals_polars(df, group_patterns):
+    """
+    Keyword group matches, per-user comment counts and comment lengths in one Polars
+    lazy query: the regexes run in Rust across threads on Arrow strings. Returned as
+    pandas, aligned to df.index, for the numpy/sklearn side.
+    """
+    comments = pl.col('Comment').fill_null('')
+    signals = (
+        pl.from_pandas(df[['Username', 'Comment']]).lazy()
+        .with_columns(comments.str.to_lowercase().alias('comment_lower'))
+        .select(
+            [pl.col('comment_lower').str.contains(regex.pattern).alias(name) for name, regex in group_patterns.items()]
+            + [
+                pl.len().over('Username').alias('user_comment_count'),
+                comments.str.len_chars().alias('comment_length'),
+            ]
+        )
+        .collect()
+    )
+    return signals.to_pandas().set_index(df.index)
 
 def derive_conversion_indicators_vectorized(df):
     """
-    Vectorized conversion likelihood derivation using optimized pandas operations
+    Behavioral conversion labels and scores, plus the intermediates the ML
+    features reuse, from one keyword scan of the comments.
+
+    Returns a dict of numpy arrays aligned with df's rows: 'labels', 'scores',
+    'comment_length', 'is_purchase_intent', 'is_interest_inquiry', 'is_positive',
+    'user_comment_count' and one entry per FEATURE_KEYWORD_PATTERNS group.
     """
     # Ensure Comment column exists and handle NaN values
     if 'Comment' not in df.columns:
         print("Warning: No 'Comment' column found. Using empty conversion scores.")
-        return np.zeros(len(df)), np.zeros(len(df))
-    
-    # Prepare comment column once
-    comments_lower = df['Comment'].fillna('').astype(str).str.lower()
-    
-    # Vectorized pattern matching - combine all patterns for single pass
-    patterns = {
-        'purchase': r'\b(?:buy|purchase|order|reserve|reservation|buying|bought|ordered)\b',
-        'timeline': r'\b(?:soon|next month|this year|202[4-9]|waiting|delivery)\b', 
-        'model': r'\b(?:r1t|r1s|r2|r3|rivian truck|rivian suv)\b',
-        'financial': r'\b(?:afford|financing|lease|payment|price|cost|budget)\b',
-        'practical': r'\b(?:delivery|warranty|service|charging|range|features|options)\b'
-    }
+        return {'labels': np.zeros(len(df), dtype=np.int8), 'scores': np.zeros(len(df), dtype=np.float32)}
     
-    # Single pass pattern detection
-    pattern_matches = {}
-    for name, pattern in patterns.items():
-        pattern_matches[name] = comments_lower.str.contains(pattern, regex=True, na=False)
-    
-    # Calculate conversion scores vectorized
-    conversion_score = (
-        pattern_matches['purchase'].astype(int) * 3 +
-        pattern_matches['timeline'].astype(int) * 2 +
-        pattern_matches['model'].astype(int) * 1.5 +
-        pattern_matches['financial'].astype(int) * 1 +
-        pattern_matches['practical'].astype(int) * 1
-    )
+    # Keyword matches, comments per user and comment lengths in one pass; the same
+    # scan serves the conversion score and the ML keyword features
+    group_patterns = {**COMPILED_CONVERSION_PATTERNS, **FEATURE_KEYWORD_PATTERNS}
+    if pl is not None:
+        pattern_matches = derive_comment_signals_polars(df, group_patterns)
+        user_counts = pattern_matches['user_comment_count'].to_numpy()
+        comment_lengths = pattern_matches['comment_length'].to_numpy()
+    else:
+        comments_lower = df['Comment'].fillna('').astype(TEXT_DTYPE).str.lower()
+        pattern_matches = match_conversion_patterns(comments_lower, group_patterns)
+        user_counts = df.groupby('Username')['Username'].transform('size').to_numpy()
+        comment_lengths = df['Comment'].fillna('').astype(TEXT_DTYPE).str.len().to_numpy()
+    high_engagement = user_counts >= 2
+    long_comments = comment_lengths > 100
     
-    # User engagement (vectorized)
-    user_counts = df['Username'].value_counts()
-    high_engagement = df['Username'].map(user_counts) >= 2
-    conversion_score += high_engagement.astype(int) * 1
-    
-    # Comment length (vectorized)
-    comment_lengths = df['Comment'].fillna('').astype(str).str.len()
-    long_comments = (comment_lengths > 100).astype(int)
-    conversion_score += long_comments * 0.5
-    
-    # Sentiment-intent combination (if available)
-    if 'Sentiment' in df.columns and 'Intent' in df.columns:
-        positive_purchase = ((df['Sentiment'] == 'POSITIVE') & (df['Intent'] == 'Purchase Intent')).astype(int)
-        conversion_score += positive_purchase * 2
-    
-    # Efficient threshold calculation
-    if conversion_score.std() == 0:
-        threshold = conversion_score.median()
-        conversion_labels = (conversion_score > threshold).astype(int)
+    # Intent/sentiment flags (if available), shared by the score and the features
+    no_flag = np.zeros(len(df), dtype=bool)
+    if 'Intent' in df.columns:
+        is_purchase_intent = (df['Intent'] == 'Purchase Intent').to_numpy(dtype=bool, na_value=False)
+        is_interest_inquiry = (df['Intent'] == 'Interest/Inquiry').to_numpy(dtype=bool, na_value=False)
+    else:
+        is_purchase_intent = is_interest_inquiry = no_flag
+    is_positive = (df['Sentiment'] == 'POSITIVE').to_numpy(dtype=bool, na_value=False) if 'Sentiment' in df.columns else no_flag
+    positive_purchase = is_positive & is_purchase_intent
+    
+    # Weighted sum of all signals as one matrix-vector product
+    signals = np.column_stack([
+        pattern_matches['purchase'], pattern_matches['timeline'], pattern_matches['model'],
+        pattern_matches['financial'], pattern_matches['practical'],
+        high_engagement, long_comments, positive_purchase
+    ]).astype(np.float32)
+    conversion_score = signals @ CONVERSION_SIGNAL_WEIGHTS
+    
+    # Threshold on the ndarray directly; a single row has no spread to measure (pandas std is NaN)
+    if len(conversion_score) > 1 and conversion_score.std() == 0:
+        threshold = np.median(conversion_score)
+        conversion_labels = (conversion_score > threshold).astype(np.int8)
     else:
-        threshold = np.percentile(conversion_score, 70)
-        conversion_labels = (conversion_score >= threshold).astype(int)
+        threshold = np.quantile(conversion_score, 0.70)
+        conversion_labels = (conversion_score >= threshold).astype(np.int8)
     
-    return conversion_labels, conversion_score
+    indicators = {
+        'labels': conversion_labels,
+        'scores': conversion_score,
+        'comment_length': comment_lengths,
+        'is_purchase_intent': is_purchase_intent.astype(np.int8),
+        'is_interest_inquiry': is_interest_inquiry.astype(np.int8),
+        'is_positive': is_positive.astype(np.int8),
+        'user_comment_count': user_counts,
+    }
+    for feature in FEATURE_KEYWORD_PATTERNS:
+        indicators[feature] = np.asarray(pattern_matches[feature], dtype=np.int8)
+    return indicators
 
 def main():
     if not os.path.exists(LEADS_CSV):
@@ -78,56 +289,34 @@ def main():
         return
     
     print("Loading leads data...")
-    df = pd.read_csv(LEADS_CSV)
+    df = data_loader.load_table(LEADS_CSV, engine=CSV_ENGINE, dtype=LEADS_CSV_DTYPES)
     if df.empty:
         print("No leads to process.")
         return
+    
+    # Missing text as '' so equality checks stay plain booleans (written back out the same)
+    text_columns = [col for col in TEXT_COLUMN_DTYPES if col in df.columns]
+    df[text_columns] = df[text_columns].fillna('')
+
+    # sklearn/joblib are only needed once there is something to train on
+    import joblib
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import classification_report, roc_auc_score
 
     print(f"Processing {len(df)} leads with vectorized behavioral analysis...")
     
     # Use optimized vectorized conversion indicators
-    conversion_labels, conversion_scores = derive_conversion_indicators_vectorized(df)
-    df['Converted'] = conversion_labels
-    df['ConversionScore'] = conversion_scores
+    indicators = derive_conversion_indicators_vectorized(df)
+    df['Converted'] = indicators.pop('labels')
+    df['ConversionScore'] = indicators.pop('scores')
     
-    print(f"✅ Identified {conversion_labels.sum()} high-probability converters from behavioral signals")
+    print(f"✅ Identified {df['Converted'].sum()} high-probability converters from behavioral signals")
 
-    # Vectorized feature engineering (avoid redundant computations)
+    # The remaining indicators are the comment, intent/sentiment, engagement and
+    # keyword features, already computed by the scoring pass
     print("Generating ML features with vectorized operations...")
-    
-    # Basic features
-    df['comment_length'] = df['Comment'].fillna('').astype(str).str.len()
-    
-    # Intent/sentiment features (if available)
-    if 'Intent' in df.columns:
-        df['is_purchase_intent'] = (df['Intent'] == 'Purchase Intent').astype(int)
-        df['is_interest_inquiry'] = (df['Intent'] == 'Interest/Inquiry').astype(int)
-    else:
-        df['is_purchase_intent'] = 0
-        df['is_interest_inquiry'] = 0
-        
-    if 'Sentiment' in df.columns:
-        df['is_positive'] = (df['Sentiment'] == 'POSITIVE').astype(int)
-    else:
-        df['is_positive'] = 0
-    
-    # User engagement (already computed, reuse)
-    user_comment_counts = df['Username'].value_counts()
-    df['user_comment_count'] = df['Username'].map(user_comment_counts)
-    
-    # Reuse pattern matches from conversion scoring (avoid recomputation)
-    comments_lower = df['Comment'].fillna('').astype(str).str.lower()
-    df['has_purchase_keywords'] = comments_lower.str.contains(
-        r'\b(?:buy|purchase|order|reserve|buying|bought|ordered)\b', regex=True, na=False
-    ).astype(int)
-    
-    df['has_timeline_urgency'] = comments_lower.str.contains(
-        r'\b(?:soon|next month|this year|202[4-9]|waiting|delivery)\b', regex=True, na=False
-    ).astype(int)
-    
-    df['discusses_financials'] = comments_lower.str.contains(
-        r'\b(?:afford|financing|lease|payment|price|cost|budget)\b', regex=True, na=False
-    ).astype(int)
+    for feature, values in indicators.items():
+        df[feature] = values
 
     # Features for ML model
     features = [
@@ -142,7 +331,8 @@ def main():
             print(f"Warning: Feature '{feature}' not found. Setting to 0.")
             df[feature] = 0
     
-    X = df[features]
+    # float32 ndarray up front: the trees work in float32, so this avoids a copy per fit/predict call
+    X = df[features].to_numpy(dtype=np.float32)
     y = df['Converted']
 
     # Only split if we have enough positive cases
@@ -152,21 +342,29 @@ def main():
     else:
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
 
-    # Train model
-    clf = RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced')
-    clf.fit(X_train, y_train)
+    # Train model, unless the saved one was fit on exactly this data
+    data_hash = training_data_hash(X, y, features)
+    clf = load_cached_model(data_hash)
+    if clf is None:
+        clf = build_classifier()
+        clf.fit(X_train, y_train)
+        
+        # Save model
+        os.makedirs("models", exist_ok=True)
+        joblib.dump(clf, MODEL_PATH)
+        with open(MODEL_HASH_PATH, "w") as f:
+            f.write(data_hash)
+    else:
+        print("Training data unchanged; reusing cached model")
     
     # Predictions
-    y_proba = clf.predict_proba(X)[:, 1]
-    
-    # Save model
-    os.makedirs("models", exist_ok=True)
-    joblib.dump(clf, MODEL_PATH)
+    y_proba = predict_unique_rows(clf, X)
 
     # Add prediction probabilities to leads
     df['ConversionProbability'] = y_proba
     df = df.sort_values(by='ConversionProbability', ascending=False)
     df.to_csv(PREDICTED_LEADS_CSV, index=False)
+    data_loader.save_parquet_sidecar(df, PREDICTED_LEADS_CSV)
 
     # Model performance
     if len(X_test) > 0 and y_test.sum() > 0 and len(X_test) != len(X_train):
@@ -181,11 +379,19 @@ def main():
     else:
         print("\nModel trained on all data (no test split due to small dataset)")
     
-    # Feature importance
+    # Feature importance: impurity-based for the forest, permutation-based otherwise
+    if hasattr(clf, 'feature_importances_'):
+        importances = clf.feature_importances_
+    else:
+        from sklearn.inspection import permutation_importance
+        importances = permutation_importance(
+            clf, X_test, y_test, n_repeats=5, random_state=42, n_jobs=-1
+        ).importances_mean
     feature_importance = pd.DataFrame({
         'feature': features,
-        'importance': clf.feature_importances_
+        'importance': importances
     }).sort_values('importance', ascending=False)
+    feature_importance.to_csv(FEATURE_IMPORTANCE_CSV, index=False)
     
     print(f"\nTop Conversion Predictors:")
     for _, row in feature_importance.head(5).iterrows():
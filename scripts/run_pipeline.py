@@ -4,6 +4,7 @@ Professional EV Lead Generation Automation Pipeline
 Using UV for environment management and Python for orchestration
 """
 
+import atexit
 import subprocess
 import sys
 import os
@@ -11,6 +12,7 @@ import time
 import json
 from datetime import datetime
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 
 class PipelineRunner:
@@ -23,6 +25,9 @@ class PipelineRunner:
         # Create log file
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         self.log_file = self.logs_dir / f"pipeline_{timestamp}.log"
+        # One line-buffered handle for the whole run instead of an open/close per message
+        self._log_fh = open(self.log_file, 'a', buffering=1)
+        atexit.register(self.close)
         
         # Metrics tracking
         self.metrics = {
@@ -44,24 +49,26 @@ class PipelineRunner:
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         log_message = f"[{timestamp}] INFO: {message}"
         print(log_message)
-        with open(self.log_file, 'a') as f:
-            f.write(log_message + '\n')
+        self._log_fh.write(log_message + '\n')
 
     def log_error(self, message):
         """Log error message to both console and file"""
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         log_message = f"[{timestamp}] ERROR: {message}"
         print(log_message, file=sys.stderr)
-        with open(self.log_file, 'a') as f:
-            f.write(log_message + '\n')
+        self._log_fh.write(log_message + '\n')
 
     def log_success(self, message):
         """Log success message to both console and file"""
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         log_message = f"[{timestamp}] SUCCESS: {message}"
         print(log_message)
-        with open(self.log_file, 'a') as f:
-            f.write(log_message + '\n')
+        self._log_fh.write(log_message + '\n')
+
+    def close(self):
+        """Close the pipeline log file"""
+        if not self._log_fh.closed:
+            self._log_fh.close()
 
     def run_uv_script(self, script_path, description):
         """Run a Python script using UV"""
@@ -99,12 +106,59 @@ class PipelineRunner:
             self.log_error(f"{description} failed with exception: {e}")
             return False
 
+    def run_uv_scripts_concurrently(self, script_paths, max_workers=4):
+        """Run independent scripts in parallel using UV; returns {script_path: succeeded}"""
+        os.chdir(self.project_dir)
+
+        def run_timed(script_path):
+            step_start = time.time()
+            result = subprocess.run(
+                ["uv", "run", "python", script_path],
+                capture_output=True,
+                text=True,
+                check=False
+            )
+            return result, time.time() - step_start
+
+        # Results are logged here as each script finishes, not from the worker threads
+        outcomes = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run_timed, script_path): script_path for script_path in script_paths}
+            for future in as_completed(futures):
+                script_path = futures[future]
+                try:
+                    result, step_duration = future.result()
+                except Exception as e:
+                    self.log_error(f"{script_path} failed with exception: {e}")
+                    outcomes[script_path] = False
+                    continue
+                
+                if result.returncode == 0:
+                    self.log_success(f"{script_path} completed in {step_duration:.1f}s")
+                    if result.stdout:
+                        self.log_info(f"Output: {result.stdout.strip()}")
+                else:
+                    self.log_error(f"{script_path} failed with exit code {result.returncode}")
+                    if result.stdout:
+                        self.log_error(f"stdout: {result.stdout}")
+                    if result.stderr:
+                        self.log_error(f"stderr: {result.stderr}")
+                outcomes[script_path] = result.returncode == 0
+        return outcomes
+
     def count_csv_rows(self, file_path):
         """Count rows in CSV file (excluding header)"""
         try:
+            parquet_path = os.path.splitext(file_path)[0] + '.parquet'
+            if os.path.exists(parquet_path) and os.path.exists(file_path) and \
+                    os.path.getmtime(parquet_path) >= os.path.getmtime(file_path):
+                # Row count straight from the Parquet footer, no data read
+                import pyarrow.parquet as pq
+                return pq.ParquetFile(parquet_path).metadata.num_rows
             if os.path.exists(file_path):
-                df = pd.read_csv(file_path)
-                return len(df)
+                # Parse only the first column; the C parser still honours quoted
+                # multi-line comments, which a raw line count would not
+                return len(pd.read_csv(file_path, usecols=[0]))
             return 0
         except Exception as e:
             self.log_error(f"Error counting rows in {file_path}: {e}")
@@ -130,7 +184,7 @@ class PipelineRunner:
         try:
             leads_file = 'data/leads_predicted.csv'
             if os.path.exists(leads_file):
-                df = pd.read_csv(leads_file)
+                df = pd.read_csv(leads_file, usecols=lambda col: col == 'ConversionProbability')
                 if 'ConversionProbability' in df.columns:
                     high_prob = len(df[df['ConversionProbability'] >= 0.95])
                     self.metrics['high_prob_leads'] = high_prob
@@ -170,12 +224,13 @@ class PipelineRunner:
             "scripts/visualize_lead_trends.py"
         ]
         
-        for script in visualization_scripts:
-            if os.path.exists(script):
-                if self.run_uv_script(script, f"Generating visualizations: {script}"):
-                    self.log_info(f"✅ {script} completed")
-                else:
-                    self.log_error(f"⚠️ {script} failed (non-critical)")
+        # The scripts share no outputs, so they run side by side
+        visualization_scripts = [script for script in visualization_scripts if os.path.exists(script)]
+        for script, succeeded in self.run_uv_scripts_concurrently(visualization_scripts).items():
+            if succeeded:
+                self.log_info(f"✅ {script} completed")
+            else:
+                self.log_error(f"⚠️ {script} failed (non-critical)")
         
         # Step 9: Calculate final metrics
         self.calculate_high_prob_leads()
@@ -294,7 +349,10 @@ def main():
     """Main entry point"""
     try:
         pipeline = PipelineRunner()
-        success = pipeline.run_pipeline()
+        try:
+            success = pipeline.run_pipeline()
+        finally:
+            pipeline.close()
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n❌ Pipeline interrupted by user")
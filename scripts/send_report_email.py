@@ -9,26 +9,40 @@ load_dotenv(dotenv_path='config/.env')
 REPORT_TXT = "reports/leads_summary.txt"
 ALERTS_TXT = "reports/alerts_summary.txt"
 FROM_EMAIL = os.getenv("GMAIL_ADDRESS")
-TO_EMAIL = os.getenv("REPORT_RECIPIENT_EMAIL")
+# Comma-separated list of recipients
+TO_EMAILS = [email.strip() for email in os.getenv("REPORT_RECIPIENT_EMAIL", "").split(",") if email.strip()]
 APP_PASSWORD = os.getenv("GMAIL_APP_PASSWORD")
 
-def send_email(subject, body, from_email, to_email, app_password):
+def send_bulk(subject, body, from_email, recipients, app_password):
+    """
+    Send the message to each recipient over one SMTP connection and login,
+    so the TLS handshake and auth are paid once. Returns the number sent.
+    """
+    sent = 0
     try:
         msg = MIMEText(body)
         msg['Subject'] = subject
         msg['From'] = from_email
-        msg['To'] = to_email
+        msg['To'] = ""
         with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
             server.login(from_email, app_password)
-            server.sendmail(from_email, [to_email], msg.as_string())
-        return True
+            for to_email in recipients:
+                msg.replace_header('To', to_email)
+                try:
+                    server.sendmail(from_email, [to_email], msg.as_string())
+                    sent += 1
+                except smtplib.SMTPRecipientsRefused as e:
+                    print(f"Error sending email to {to_email}: {e}")
     except Exception as e:
         print(f"Error sending email: {e}")
-        return False
+    return sent
+
+def send_email(subject, body, from_email, to_email, app_password):
+    return send_bulk(subject, body, from_email, [to_email], app_password) == 1
 
 def main():
     # Check if email credentials are configured
-    if not all([FROM_EMAIL, TO_EMAIL, APP_PASSWORD]):
+    if not all([FROM_EMAIL, TO_EMAILS, APP_PASSWORD]):
         print("Email credentials not configured. Skipping email notification.")
         print("To enable email notifications, set GMAIL_ADDRESS, REPORT_RECIPIENT_EMAIL, and GMAIL_APP_PASSWORD in config/.env")
         return
@@ -42,18 +56,18 @@ def main():
             with open(ALERTS_TXT) as f2:
                 body += "\n\n" + f2.read()
         
-        success = send_email(
+        sent = send_bulk(
             subject="Daily Lead Generation Report & Alerts",
             body=body,
             from_email=FROM_EMAIL,
-            to_email=TO_EMAIL,
+            recipients=TO_EMAILS,
             app_password=APP_PASSWORD
         )
         
-        if success:
-            print("Report and alerts emailed successfully.")
+        if sent == len(TO_EMAILS):
+            print(f"Report and alerts emailed successfully to {sent} recipient(s).")
         else:
-            print("Failed to send email report.")
+            print(f"Failed to send email report to {len(TO_EMAILS) - sent} of {len(TO_EMAILS)} recipient(s).")
     else:
         print(f"No report found at {REPORT_TXT} to email.")
 
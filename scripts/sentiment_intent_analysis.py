@@ -2,80 +2,274 @@ import pandas as pd
 import os
 import re
 import torch
-from transformers import pipeline
+from transformers import Pipeline, pipeline
 import numpy as np
-from tqdm import tqdm
+from utils import data_loader
+
+try:
+    import hyperscan
+except ImportError:  # optional: fall back to per-pattern re.search
+    hyperscan = None
 
 CLEAN_CSV = "data/comments_data_cleaned.csv"
 OUTPUT_CSV = "data/comments_data_enriched.csv"
 
 # Determine device and batch size based on system capabilities
 device = 0 if torch.cuda.is_available() else -1
-batch_size = 32 if torch.cuda.is_available() else 16
+# DistilBERT keeps gaining throughput up to ~128-256 sequences per GPU batch
+batch_size = int(os.getenv("SENTIMENT_BATCH_SIZE", 128 if torch.cuda.is_available() else 32))
+
+# DataLoader workers tokenizing upcoming batches while the GPU runs the current one
+num_workers = int(os.getenv("SENTIMENT_NUM_WORKERS", 4 if torch.cuda.is_available() else 0))
+
+# Comments are truncated to this many tokens; longer ones rarely change the label
+MAX_SEQUENCE_LENGTH = 256
+
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+SENTIMENT_ONNX_MODEL_DIR = os.getenv("SENTIMENT_ONNX_MODEL_DIR", "models/distilbert_onnx")
+
+class OnnxSentimentClassifier:
+    """
+    Direct ONNX Runtime inference on an exported sentiment model: each batch is
+    tokenized to numpy, run through the session and the logits argmaxed. Called
+    like the transformers pipeline it stands in for.
+    """
+
+    def __init__(self, onnx_model_dir, use_gpu=False):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(onnx_model_dir, use_fast=True)
+        id2label = AutoConfig.from_pretrained(onnx_model_dir).id2label
+        self.labels = np.array([id2label[i] for i in range(len(id2label))], dtype=object)
+
+        # Operator fusion (attention, LayerNorm, MatMul+Add) on the loaded graph
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(onnx_model_dir, "model.onnx"), session_options,
+            providers=self._providers(ort, onnx_model_dir, use_gpu)
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    @staticmethod
+    def _providers(ort, onnx_model_dir, use_gpu):
+        """TensorRT FP16 (engine cached next to the model), then CUDA, then CPU"""
+        available = ort.get_available_providers()
+        providers = []
+        if use_gpu and "TensorrtExecutionProvider" in available:
+            def shapes(batch, length):
+                return f"input_ids:{batch}x{length},attention_mask:{batch}x{length}"
+            providers.append(("TensorrtExecutionProvider", {
+                "trt_fp16_enable": True,
+                "trt_engine_cache_enable": True,
+                "trt_engine_cache_path": os.path.join(onnx_model_dir, "trt_cache"),
+                "trt_profile_min_shapes": shapes(1, 1),
+                "trt_profile_opt_shapes": shapes(32, 128),
+                "trt_profile_max_shapes": shapes(batch_size, MAX_SEQUENCE_LENGTH),
+            }))
+        if use_gpu and "CUDAExecutionProvider" in available:
+            providers.append("CUDAExecutionProvider")
+        providers.append("CPUExecutionProvider")
+        return providers
+
+    def __call__(self, texts, batch_size=batch_size, truncation=True, max_length=MAX_SEQUENCE_LENGTH):
+        if isinstance(texts, str):
+            texts = [texts]
+        # Tokenize everything in one call; the loop below only pads and runs the session
+        encoded = self.tokenizer(list(texts), truncation=truncation, max_length=max_length)
+        names = [name for name in encoded if name in self.input_names]
+        features = [{name: encoded[name][i] for name in names} for i in range(len(texts))]
+
+        label_ids = np.empty(len(texts), dtype=np.int8)
+        for start in range(0, len(texts), batch_size):
+            label_ids[start:start + batch_size] = self._predict(features[start:start + batch_size])
+        return [{"label": label} for label in self.labels[label_ids]]
+
+    def _predict(self, features):
+        """Label ids for one batch; a failing batch is split in half and retried"""
+        try:
+            padded = self.tokenizer.pad(features, padding="longest", return_tensors="np")
+            return self.session.run(None, dict(padded))[0].argmax(axis=-1)
+        except Exception:
+            if len(features) == 1:
+                raise
+            middle = len(features) // 2
+            return np.concatenate([self._predict(features[:middle]), self._predict(features[middle:])])
+
+def load_sentiment_analyzer(model_name=SENTIMENT_MODEL, onnx_model_dir=SENTIMENT_ONNX_MODEL_DIR):
+    """
+    Sentiment classifier. An exported ONNX model in onnx_model_dir runs on ONNX
+    Runtime when onnxruntime is installed (TensorRT FP16 or CUDA on GPU). Otherwise
+    the PyTorch model: fp16 and torch.compile'd on GPU (SENTIMENT_TORCH_COMPILE=0 to
+    run eager), and on CPU its Linear layers dynamically quantized to int8 (set
+    SENTIMENT_INT8=0 to keep fp32, or SENTIMENT_INT8=0 SENTIMENT_BF16=1 for bf16
+    weights on CPUs with native bf16 such as Sapphire Rapids), using SENTIMENT_NUM_THREADS
+    intra-op threads (default: all CPUs). Tokenizers are always the Rust (fast) ones.
+    Export the ONNX model once with:
+
+        optimum-cli export onnx --model distilbert-base-uncased-finetuned-sst-2-english --task text-classification models/distilbert_onnx
+    """
+    if onnx_model_dir and os.path.isfile(os.path.join(onnx_model_dir, "model.onnx")):
+        try:
+            classifier = OnnxSentimentClassifier(onnx_model_dir, use_gpu=torch.cuda.is_available())
+            print(f"Using ONNX Runtime sentiment model from {onnx_model_dir} ({classifier.session.get_providers()[0]})")
+            return classifier
+        except ImportError:
+            print("onnxruntime not installed; using the PyTorch model")
+
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    if torch.cuda.is_available():
+        classifier = pipeline(
+            "sentiment-analysis",
+            model=model_name,
+            tokenizer=AutoTokenizer.from_pretrained(model_name, use_fast=True),
+            device=device,
+            torch_dtype=torch.float16,
+            batch_size=batch_size
+        )
+        if os.getenv("SENTIMENT_TORCH_COMPILE", "1") == "1":
+            try:
+                # dynamic shapes: length-bucketed batches vary in padded length
+                classifier.model = torch.compile(classifier.model, dynamic=True)
+                classifier("warm up the compiled graph")
+            except Exception as e:
+                print(f"torch.compile unavailable, running eager: {e}")
+                classifier.model = getattr(classifier.model, "_orig_mod", classifier.model)
+        return classifier
+
+    # torch defaults to the physical core count; use every logical CPU unless told otherwise
+    torch.set_num_threads(int(os.getenv("SENTIMENT_NUM_THREADS", os.cpu_count() or 1)))
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    if os.getenv("SENTIMENT_INT8", "1") == "1":
+        from torch.ao.quantization import quantize_dynamic
+        model = quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif os.getenv("SENTIMENT_BF16", "0") == "1":
+        model = model.to(torch.bfloat16)
+    return pipeline(
+        "sentiment-analysis",
+        model=model,
+        tokenizer=AutoTokenizer.from_pretrained(model_name, use_fast=True),
+        device=device,
+        batch_size=batch_size
+    )
 
 # Load sentiment analysis pipeline with GPU support and batching
-sentiment_analyzer = pipeline(
-    "sentiment-analysis", 
-    model="distilbert-base-uncased-finetuned-sst-2-english",
-    device=device,
-    batch_size=batch_size,
-    return_all_scores=False
-)
+sentiment_analyzer = load_sentiment_analyzer()
+
+# Intent keyword patterns, compiled once
+PURCHASE_RE = re.compile(r'\b(?:buy|purchase|test drive|own|order|reserve|book|get one|get this|interested in buying)\b')
+INQUIRY_RE = re.compile(r'\b(?:how much|price|cost|range|feature|spec|availability|when|where|details|info|information|question)\b')
+COMPETITOR_RE = re.compile(r'\b(?:tesla|ford|chevy|hyundai|kia|volkswagen|bmw|mercedes|audi)\b')
+QUESTION_RE = re.compile(r'\?')
+INTENT_PATTERNS = [PURCHASE_RE, INQUIRY_RE, COMPETITOR_RE, QUESTION_RE]
+
+def build_intent_database():
+    """All intent patterns in one Hyperscan block-mode database (id = position in INTENT_PATTERNS)"""
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[regex.pattern.encode("utf-8") for regex in INTENT_PATTERNS],
+        ids=list(range(len(INTENT_PATTERNS))),
+        elements=len(INTENT_PATTERNS),
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(INTENT_PATTERNS)
+    )
+    return database
+
+INTENT_DATABASE = build_intent_database() if hyperscan is not None else None
+
+def match_intent_patterns(comments_lower):
+    """
+    (comment x INTENT_PATTERNS) match flags: one Hyperscan pass per comment when
+    available, else a compiled re.search per pattern
+    """
+    hits = np.zeros((len(comments_lower), len(INTENT_PATTERNS)), dtype=bool)
+    if INTENT_DATABASE is not None:
+        # Cleaned comments are ASCII, so Hyperscan's ASCII \b matches re's
+        def on_match(pattern_id, start, end, flags, row):
+            hits[row, pattern_id] = True
+
+        for row, text in enumerate(comments_lower):
+            if text:
+                INTENT_DATABASE.scan(text.encode("utf-8"), match_event_handler=on_match, context=row)
+    else:
+        # Separate searches beat one (?P<purchase>...)|(?P<inquiry>...)|... finditer pass:
+        # re backtracks through every alternative at each position (~1.5x slower here)
+        for j, regex in enumerate(INTENT_PATTERNS):
+            if regex is QUESTION_RE:
+                hits[:, j] = ['?' in text for text in comments_lower]
+            else:
+                hits[:, j] = [regex.search(text) is not None for text in comments_lower]
+    return hits
 
 # Vectorized intent detection for batch processing
 def detect_intent_vectorized(comments_series):
-    """Vectorized intent detection using pandas string operations"""
-    comments_lower = comments_series.str.lower()
-    
-    # Purchase Intent - highest priority
-    purchase_pattern = r'\b(?:buy|purchase|test drive|own|order|reserve|book|get one|get this|interested in buying)\b'
-    purchase_mask = comments_lower.str.contains(purchase_pattern, regex=True, na=False)
-    
-    # Inquiry/Interest 
-    inquiry_pattern = r'\b(?:how much|price|cost|range|feature|spec|availability|when|where|details|info|information|question)\b'
-    inquiry_mask = comments_lower.str.contains(inquiry_pattern, regex=True, na=False) | comments_series.str.contains('\?', na=False)
-    
-    # Competitor Mention
-    competitor_pattern = r'\b(?:tesla|ford|chevy|hyundai|kia|volkswagen|bmw|mercedes|audi)\b'
-    competitor_mask = comments_lower.str.contains(competitor_pattern, regex=True, na=False)
+    """Intent per comment from a single multi-pattern match of the lowercased text"""
+    # Each distinct comment is matched once; codes map rows back (-1 = missing -> the trailing '')
+    codes, unique_comments = pd.factorize(comments_series)
+    comments_lower = [text.lower() if isinstance(text, str) else "" for text in unique_comments.tolist()] + [""]
+    hits = match_intent_patterns(comments_lower)
     
     # Assign intents based on priority (Purchase > Inquiry > Competitor > General)
-    intents = pd.Series("General Comment", index=comments_series.index)
-    intents[competitor_mask] = "Competitor Mention"
-    intents[inquiry_mask] = "Interest/Inquiry"
-    intents[purchase_mask] = "Purchase Intent"
-    
-    return intents
+    intents = np.select(
+        [hits[:, 0], hits[:, 1] | hits[:, 3], hits[:, 2]],
+        ["Purchase Intent", "Interest/Inquiry", "Competitor Mention"],
+        default="General Comment"
+    )
+    return pd.Series(intents[codes], index=comments_series.index)
 
-def process_sentiment_batch(comments_batch):
-    """Process sentiment analysis in batches with error handling"""
+def sort_by_token_length(texts):
+    """
+    Texts ordered by (truncated) token count, so each batch pads to a similar
+    length instead of to the longest comment in a file-order window
+    """
+    tokenizer = getattr(sentiment_analyzer, "tokenizer", None)
+    if tokenizer is None:
+        lengths = [len(text) for text in texts]
+    else:
+        lengths = [len(ids) for ids in tokenizer(texts, truncation=True, max_length=MAX_SEQUENCE_LENGTH)["input_ids"]]
+    return [texts[i] for i in np.argsort(lengths, kind="stable")]
+
+def classify_comments(comments):
+    """Sentiment labels for a list of comments; a failing batch is split in half and retried"""
     try:
-        # Convert to list and filter out empty/null comments
-        comments_list = [str(comment) for comment in comments_batch if pd.notna(comment) and str(comment).strip()]
-        
-        if not comments_list:
-            return ["NEUTRAL"] * len(comments_batch)
-        
-        # Process batch through sentiment analyzer
-        results = sentiment_analyzer(comments_list)
-        
-        # Extract labels and map back to original batch size
-        sentiments = []
-        result_idx = 0
-        
-        for comment in comments_batch:
-            if pd.notna(comment) and str(comment).strip():
-                sentiments.append(results[result_idx]['label'])
-                result_idx += 1
-            else:
-                sentiments.append("NEUTRAL")
-        
-        return sentiments
-        
+        # No autograd bookkeeping for any backend, including custom ones
+        with torch.inference_mode():
+            # The ONNX classifier tokenizes all comments up front, only the pipeline takes workers.
+            # A list goes through the pipeline's own DataLoader already; a generator would
+            # become an IterableDataset, which the pipeline limits to a single worker
+            loader_kwargs = {"num_workers": num_workers} if isinstance(sentiment_analyzer, Pipeline) else {}
+            results = sentiment_analyzer(comments, batch_size=batch_size, truncation=True, max_length=MAX_SEQUENCE_LENGTH, **loader_kwargs)
+        return [result['label'] for result in results]
     except Exception as e:
-        print(f"Batch processing failed, falling back to individual processing: {e}")
-        # Fallback to individual processing
-        return [sentiment_analyzer(str(comment))[0]['label'] if pd.notna(comment) else "NEUTRAL" for comment in comments_batch]
+        if len(comments) == 1:
+            print(f"Sentiment analysis failed for a comment, marking it NEUTRAL: {e}")
+            return ["NEUTRAL"]
+        middle = len(comments) // 2
+        return classify_comments(comments[:middle]) + classify_comments(comments[middle:])
+
+def process_sentiment_batch(comments_batch):
+    """
+    Sentiment labels for an array of comment strings in one classifier call; the
+    classifier pads and batches internally (batch_size). Each distinct comment is
+    scored once, empty comments are NEUTRAL without touching the model
+    """
+    # Object dtype throughout: a fixed-width '<U' array would size every row to the longest comment
+    comments = pd.Series(comments_batch, dtype=object).fillna("").astype(str).to_numpy()
+    labels = np.full(len(comments), "NEUTRAL", dtype=object)
+    nonempty_mask = np.array([bool(comment.strip()) for comment in comments], dtype=bool)
+    if not nonempty_mask.any():
+        return labels
+    
+    # Distinct non-empty comments; inverse maps each row back to its comment
+    inverse, unique_comments = pd.factorize(comments[nonempty_mask])
+    
+    # Process length-bucketed batches through sentiment analyzer
+    ordered = sort_by_token_length(unique_comments.tolist())
+    predicted = dict(zip(ordered, classify_comments(ordered)))
+    
+    # Scatter labels back to every non-empty row, duplicates included
+    unique_labels = np.array([predicted[comment] for comment in unique_comments], dtype=object)
+    labels[nonempty_mask] = unique_labels[inverse]
+    return labels
 
 def main():
     if not os.path.exists(CLEAN_CSV):
@@ -83,7 +277,7 @@ def main():
         return
     
     print("Loading cleaned data...")
-    df = pd.read_csv(CLEAN_CSV)
+    df = data_loader.load_table(CLEAN_CSV)
     if df.empty:
         print("No data to process.")
         return
@@ -94,21 +288,16 @@ def main():
     print("Applying vectorized intent detection...")
     df["Intent"] = detect_intent_vectorized(df["Cleaned_Comment"])
     
-    # Batch sentiment analysis with progress bar
+    # Batch sentiment analysis
     print("Running optimized sentiment analysis...")
-    comments = df["Cleaned_Comment"].fillna("").astype(str).tolist()
-    
-    # Process in optimized batches
-    all_sentiments = []
-    for i in tqdm(range(0, len(comments), batch_size), desc="Processing sentiment batches"):
-        batch = comments[i:i + batch_size]
-        batch_sentiments = process_sentiment_batch(batch)
-        all_sentiments.extend(batch_sentiments)
+    comments = df["Cleaned_Comment"].fillna("").to_numpy(copy=False)
     
-    df["Sentiment"] = all_sentiments
+    # Whole column in one call; the pipeline batches internally
+    df["Sentiment"] = process_sentiment_batch(comments)
     
     # Save enriched data
     df.to_csv(OUTPUT_CSV, index=False)
+    data_loader.save_parquet_sidecar(df, OUTPUT_CSV)
     print(f"✅ Optimized processing complete! Enriched data saved to {OUTPUT_CSV}")
     print(f"📊 Processed {len(df)} comments with GPU acceleration: {'✅' if torch.cuda.is_available() else '❌'}")
     
@@ -4,6 +4,7 @@ Consolidates common data loading, validation, and processing functions
 """
 
 import os
+import functools
 import pandas as pd
 import numpy as np
 import json
@@ -12,7 +13,82 @@ from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import hashlib
-import pickle
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows: psutil instead
+    resource = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # optional: plain pandas CSV parsing
+    pa = pa_csv = None
+
+# HTML figures load plotly.js from its CDN (a few KB per file instead of ~3.5 MB);
+# PLOTLY_OFFLINE=1 embeds it for viewing without network access
+PLOTLY_INCLUDE_JS = True if os.getenv("PLOTLY_OFFLINE") == "1" else "cdn"
+
+def read_csv_arrow(file_path: str, timestamp_columns: Tuple[str, ...] = ("Timestamp",),
+                   category_columns: Tuple[str, ...] = ()) -> pd.DataFrame:
+    """
+    Read a CSV with PyArrow's multithreaded block reader, parsing the timestamp
+    columns to UTC datetimes in C and low-cardinality label columns straight to
+    pandas categoricals. Falls back to pd.read_csv when pyarrow is not installed
+    or a timestamp cell has no zone offset / does not parse.
+    """
+    if pa_csv is not None:
+        column_types = {col: pa.timestamp("ns", tz="UTC") for col in timestamp_columns}
+        column_types.update({col: pa.dictionary(pa.int32(), pa.string()) for col in category_columns})
+        try:
+            table = pa_csv.read_csv(
+                file_path,
+                read_options=pa_csv.ReadOptions(use_threads=True, block_size=32 << 20),
+                convert_options=pa_csv.ConvertOptions(column_types=column_types),
+            )
+            return table.to_pandas()
+        except pa.ArrowInvalid as e:
+            logging.getLogger(__name__).debug(f"PyArrow CSV read of {file_path} failed, using pandas: {e}")
+    return pd.read_csv(file_path, dtype={col: "category" for col in category_columns})
+
+def count_by_day(timestamps: pd.Series, count_name: str) -> pd.DataFrame:
+    """
+    Rows per calendar day from non-null datetimes, every day from the first to the
+    last included, via np.bincount on integer day numbers instead of a hash groupby
+    """
+    if timestamps.empty:
+        return pd.DataFrame({'date': [], count_name: []})
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+    day_numbers = timestamps.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    first_day = day_numbers.min()
+    counts = np.bincount(day_numbers - first_day)
+    dates = pd.date_range(np.datetime64(int(first_day), 'D'), periods=len(counts), freq='D')
+    return pd.DataFrame({'date': dates.date, count_name: counts})
+
+def top_k_rows(df: pd.DataFrame, column: str, k: int) -> pd.DataFrame:
+    """
+    Same rows and order as df.nlargest(k, column) for a numeric column: an O(N)
+    np.partition finds the k-th largest value, and only the rows at or above it are sorted
+    """
+    values = df[column].to_numpy(dtype=np.float64)
+    is_nan = np.isnan(values)
+    candidates = np.flatnonzero(~is_nan)
+    if 0 < k < len(candidates):
+        kth_value = np.partition(values[candidates], len(candidates) - k)[len(candidates) - k]
+        candidates = candidates[values[candidates] >= kth_value]
+    # Stable sort keeps the first of tied rows, like nlargest(keep='first')
+    order = candidates[np.argsort(-values[candidates], kind='stable')]
+    # Like nlargest, NaN rows only fill the result when there are fewer than k numbers
+    order = np.concatenate([order, np.flatnonzero(is_nan)])
+    return df.iloc[order[:max(k, 0)]]
+
+@functools.lru_cache(maxsize=128)
+def _path_hash(file_path: str) -> str:
+    """MD5 of a file path, computed once per path; the pipeline loads the same few files repeatedly"""
+    return hashlib.md5(file_path.encode()).hexdigest()
+
 
 class DataLoader:
     """Centralized data loading and caching utility"""
@@ -24,16 +100,17 @@ class DataLoader:
     
     def _get_cache_key(self, file_path: str) -> str:
         """Generate cache key based on file path and modification time"""
+        path_hash = _path_hash(file_path)
         try:
+            # mtime and size go into the name as-is; only the path needs hashing to be filename-safe
             stat = os.stat(file_path)
-            content = f"{file_path}_{stat.st_mtime}_{stat.st_size}"
-            return hashlib.md5(content.encode()).hexdigest()
+            return f"{path_hash[:8]}_{stat.st_mtime_ns}_{stat.st_size}"
         except OSError:
-            return hashlib.md5(file_path.encode()).hexdigest()
+            return path_hash
     
     def _get_cache_path(self, cache_key: str) -> Path:
         """Get cache file path for given cache key"""
-        return self.cache_dir / f"{cache_key}.pkl"
+        return self.cache_dir / f"{cache_key}.parquet"
     
     def load_csv_cached(self, file_path: str, **kwargs) -> Optional[pd.DataFrame]:
         """Load CSV with caching to prevent redundant reads"""
@@ -47,8 +124,7 @@ class DataLoader:
         # Try to load from cache first
         if cache_path.exists():
             try:
-                with open(cache_path, 'rb') as f:
-                    df = pickle.load(f)
+                df = pd.read_parquet(cache_path)
                 self.logger.debug(f"Loaded {file_path} from cache")
                 return df
             except Exception as e:
@@ -56,11 +132,15 @@ class DataLoader:
         
         # Load from file and cache
         try:
-            df = pd.read_csv(file_path, **kwargs)
+            df = pd.read_csv(file_path, **kwargs) if kwargs else read_csv_arrow(file_path)
             
-            # Cache the dataframe
-            with open(cache_path, 'wb') as f:
-                pickle.dump(df, f)
+            # Cache the dataframe as columnar, compressed Parquet
+            try:
+                df.to_parquet(cache_path, compression="zstd")
+            except Exception as e:
+                # e.g. pyarrow not installed, or an object column mixing types
+                self.logger.warning(f"Cache write skipped for {file_path}: {e}")
+                FileUtils.safe_remove(str(cache_path))
             
             self.logger.info(f"Loaded {len(df)} rows from {file_path}")
             return df
@@ -69,6 +149,47 @@ class DataLoader:
             self.logger.error(f"Failed to load {file_path}: {e}")
             return None
     
+    @staticmethod
+    def parquet_path(file_path: str) -> str:
+        """Path of the Parquet copy written next to a pipeline CSV"""
+        return str(Path(file_path).with_suffix(".parquet"))
+    
+    def save_parquet_sidecar(self, df: pd.DataFrame, file_path: str) -> bool:
+        """Write a typed, compressed Parquet copy of a pipeline CSV for the next stage to read"""
+        parquet_path = self.parquet_path(file_path)
+        try:
+            df.to_parquet(parquet_path, index=False, compression="snappy")
+            return True
+        except Exception as e:
+            # e.g. pyarrow not installed, or an object column mixing types
+            self.logger.warning(f"Skipped Parquet copy of {file_path}: {e}")
+            FileUtils.safe_remove(parquet_path)
+            return False
+    
+    def load_table(self, file_path: str, dtype: Optional[Dict[str, Any]] = None, **csv_kwargs) -> Optional[pd.DataFrame]:
+        """
+        Load a pipeline table from its Parquet copy when that is at least as new as
+        the CSV, otherwise from the CSV itself
+        """
+        parquet_path = self.parquet_path(file_path)
+        if os.path.exists(parquet_path) and (
+            not os.path.exists(file_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(file_path)
+        ):
+            try:
+                df = pd.read_parquet(parquet_path)
+                if dtype:
+                    # Parquet strings already come back as strings; astype(str) would turn None into 'None' on pandas 2
+                    df = df.astype({col: col_type for col, col_type in dtype.items() if col in df.columns and col_type is not str})
+                self.logger.debug(f"Loaded {file_path} from {parquet_path}")
+                return df
+            except Exception as e:
+                self.logger.warning(f"Parquet read failed for {parquet_path}, using CSV: {e}")
+        
+        if not os.path.exists(file_path):
+            self.logger.warning(f"File not found: {file_path}")
+            return None
+        return pd.read_csv(file_path, dtype=dtype, **csv_kwargs)
+    
     def save_csv_safe(self, df: pd.DataFrame, file_path: str, backup: bool = True) -> bool:
         """Safely save CSV with backup and validation"""
         try:
@@ -249,7 +370,14 @@ class PerformanceMonitor:
         return duration
     
     def get_memory_usage_mb(self) -> float:
-        """Get current memory usage in MB"""
+        """
+        Get peak resident memory in MB: one getrusage call on POSIX (cheap enough for
+        hot loops), psutil's current RSS elsewhere
+        """
+        if resource is not None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is bytes on macOS, kilobytes on Linux
+            return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
         try:
             import psutil
             process = psutil.Process(os.getpid())
@@ -264,7 +392,7 @@ class PerformanceMonitor:
         
         self.logger.info(f"Performance Summary:")
         self.logger.info(f"  Total execution time: {total_time:.2f}s")
-        self.logger.info(f"  Memory usage: {memory_mb:.1f}MB")
+        self.logger.info(f"  Peak memory usage: {memory_mb:.1f}MB")
         
         for name, duration in self.checkpoints.items():
             self.logger.info(f"  {name}: {duration:.2f}s")
@@ -1,28 +1,45 @@
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import os
-from wordcloud import WordCloud
+import re
+from collections import Counter
+from utils import read_csv_arrow, count_by_day, PLOTLY_INCLUDE_JS
+from wordcloud import WordCloud, STOPWORDS
 import matplotlib.pyplot as plt
 
 CLEAN_CSV = "data/comments_data_cleaned.csv"
 IMG_DIR = "visualizations"
+# Pipeline runs only write the files; PLOTLY_SHOW=1 also opens each figure
+INTERACTIVE = os.getenv("PLOTLY_SHOW") == "1"
+WORD_RE = re.compile(r"[a-z]{3,}")
 
 def load_data():
     if not os.path.exists(CLEAN_CSV):
         print(f"Cleaned data file not found: {CLEAN_CSV}")
         return None
-    return pd.read_csv(CLEAN_CSV)
+    return read_csv_arrow(CLEAN_CSV)
 
-def plot_wordcloud(texts, title, save_path=None):
-    text = " ".join(texts)
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(text)
+def plot_wordcloud(texts, title, save_path=None, max_words=200):
+    # Count words row by row instead of joining one huge string; WordCloud only lays out the top words
+    counter = Counter()
+    for text in texts:
+        if isinstance(text, str):
+            counter.update(word for word in WORD_RE.findall(text.lower()) if word not in STOPWORDS)
+    if not counter:
+        print("No words to draw a word cloud from.")
+        return
+    wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(
+        dict(counter.most_common(max_words))
+    )
     plt.figure(figsize=(10, 5))
     plt.imshow(wordcloud, interpolation='bilinear')
     plt.axis('off')
     plt.title(title)
     if save_path:
         plt.savefig(save_path, bbox_inches='tight')
-    plt.show()
+    if INTERACTIVE:
+        plt.show()
     plt.close()
 
 def main():
@@ -39,43 +56,48 @@ def main():
     # 1. Top 10 Most Active Users
     user_counts = df['Username'].value_counts().head(10)
     fig1 = px.bar(user_counts, title='Top 10 Most Active Users', labels={'index': 'Username', 'value': 'Number of Comments'})
-    fig1.write_html(f"{IMG_DIR}/top_10_users.html")
-    fig1.show()
+    fig1.write_html(f"{IMG_DIR}/top_10_users.html", include_plotlyjs=PLOTLY_INCLUDE_JS)
+    if INTERACTIVE:
+        fig1.show()
 
     # 2. Comment Length Distribution
     df['comment_length'] = df['Cleaned_Comment'].str.len()
     fig2 = px.histogram(df, x='comment_length', nbins=30, title='Comment Length Distribution')
-    fig2.write_html(f"{IMG_DIR}/comment_length_distribution.html")
-    fig2.show()
+    fig2.write_html(f"{IMG_DIR}/comment_length_distribution.html", include_plotlyjs=PLOTLY_INCLUDE_JS)
+    if INTERACTIVE:
+        fig2.show()
 
     # 3. Comments Over Time
     if 'Timestamp' in df.columns:
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
+        # Parse once (ISO 8601 from the API, no format inference); day and hour counts both derive from it
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce', format='ISO8601', utc=True)
         df = df.dropna(subset=['Timestamp'])
-        df['date'] = df['Timestamp'].dt.date
-        date_counts = df.groupby('date').size().reset_index(name='num_comments')
+        df['hour'] = df['Timestamp'].dt.hour
+        date_counts = count_by_day(df['Timestamp'], 'num_comments')
         fig3 = px.line(date_counts, x='date', y='num_comments', title='Comments Over Time')
-        fig3.write_html(f"{IMG_DIR}/comments_over_time.html")
-        fig3.show()
+        fig3.write_html(f"{IMG_DIR}/comments_over_time.html", include_plotlyjs=PLOTLY_INCLUDE_JS)
+        if INTERACTIVE:
+            fig3.show()
 
     # 4. Word Cloud of Most Common Words
     plot_wordcloud(df['Cleaned_Comment'], 'Most Common Words in Comments', save_path=f"{IMG_DIR}/wordcloud.png")
 
     # 5. Comments by Hour of Day (Engagement Pattern)
     if 'Timestamp' in df.columns:
-        df['hour'] = pd.to_datetime(df['Timestamp'], errors='coerce').dt.hour
-        hour_counts = df.groupby('hour').size().reset_index(name='num_comments')
+        hour_counts = pd.DataFrame({'hour': np.arange(24), 'num_comments': np.bincount(df['hour'], minlength=24)})
         fig5 = px.bar(hour_counts, x='hour', y='num_comments', title='Comments by Hour of Day', labels={'hour': 'Hour of Day', 'num_comments': 'Number of Comments'})
-        fig5.write_html(f"{IMG_DIR}/comments_by_hour.html")
-        fig5.show()
+        fig5.write_html(f"{IMG_DIR}/comments_by_hour.html", include_plotlyjs=PLOTLY_INCLUDE_JS)
+        if INTERACTIVE:
+            fig5.show()
 
     # 6. Pie Chart: Top 5 Users vs Others
     top5 = user_counts.head(5)
     others = user_counts[5:].sum()
     pie_data = pd.concat([top5, pd.Series({'Others': others})])
     fig6 = px.pie(pie_data, values=pie_data.values, names=pie_data.index, title='Top 5 Users vs Others')
-    fig6.write_html(f"{IMG_DIR}/top5_vs_others_pie.html")
-    fig6.show()
+    fig6.write_html(f"{IMG_DIR}/top5_vs_others_pie.html", include_plotlyjs=PLOTLY_INCLUDE_JS)
+    if INTERACTIVE:
+        fig6.show()
 
     print(f"\n[INFO] All visualizations saved as HTML (and word cloud as PNG) in the '{IMG_DIR}' directory.")
     print("[INFO] Open the HTML files in your browser to view and export PNGs using the camera icon.")
@@ -1,28 +1,31 @@
 import pandas as pd
 import plotly.express as px
 import os
+from utils import read_csv_arrow, count_by_day, PLOTLY_INCLUDE_JS
 
 LEADS_CSV = "data/qualified_leads.csv"
 IMG_DIR = "visualizations"
+# Pipeline runs only write the files; PLOTLY_SHOW=1 also opens each figure
+INTERACTIVE = os.getenv("PLOTLY_SHOW") == "1"
 
 def main():
     if not os.path.exists(LEADS_CSV):
         print(f"No leads data found at {LEADS_CSV}.")
         return
     
-    df = pd.read_csv(LEADS_CSV)
+    df = read_csv_arrow(LEADS_CSV)
     os.makedirs(IMG_DIR, exist_ok=True)
     
     print(f"Total qualified leads: {len(df)}")
     
     if 'Timestamp' in df.columns:
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce', format='ISO8601', utc=True)
         df = df.dropna(subset=['Timestamp'])
-        df['date'] = df['Timestamp'].dt.date
-        leads_over_time = df.groupby('date').size().reset_index(name='num_leads')
+        leads_over_time = count_by_day(df['Timestamp'], 'num_leads')
         fig = px.line(leads_over_time, x='date', y='num_leads', title='Qualified Leads Generated Over Time')
-        fig.write_html(f"{IMG_DIR}/leads_over_time.html")
-        fig.show()
+        fig.write_html(f"{IMG_DIR}/leads_over_time.html", include_plotlyjs=PLOTLY_INCLUDE_JS)
+        if INTERACTIVE:
+            fig.show()
         print(f"Lead trends visualization saved to {IMG_DIR}/leads_over_time.html")
     else:
         print("No 'Timestamp' column found in leads data.")
@@ -1,20 +1,65 @@
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import os
-import joblib
+from utils import read_csv_arrow, top_k_rows, PLOTLY_INCLUDE_JS
 
 LEADS_PREDICTED_CSV = "data/leads_predicted.csv"
 MODEL_PATH = "models/lead_conversion_model.pkl"
+FEATURE_IMPORTANCE_CSV = "models/feature_importances.csv"
 IMG_DIR = "visualizations"
+# Pipeline runs only write the files; PLOTLY_SHOW=1 also opens each figure
+INTERACTIVE = os.getenv("PLOTLY_SHOW") == "1"
+# PLOTLY_EXPORT_PNG=1 also writes static PNGs (needs kaleido) for viewers without plotly.js
+EXPORT_PNG = os.getenv("PLOTLY_EXPORT_PNG") == "1"
+
+def export_pngs(figures):
+    """Write (figure, path) pairs as PNGs through one Kaleido browser session"""
+    if not figures:
+        return
+    import plotly.io as pio
+    figs, paths = zip(*figures)
+    try:
+        if hasattr(pio, "write_images"):
+            pio.write_images(list(figs), list(paths), width=900, height=600)
+        else:  # plotly < 6.1: one export per figure
+            for fig, path in figures:
+                fig.write_image(path, width=900, height=600)
+        print(f"[INFO] Saved {len(paths)} PNG exports to the '{IMG_DIR}' directory.")
+    except Exception as e:
+        print(f"PNG export skipped: {str(e).strip()}")
+
+def load_feature_importances():
+    """
+    (features, importances) as saved by predictive_lead_scoring.py; older runs
+    without that file fall back to unpickling the model (and importing sklearn)
+    """
+    if os.path.exists(FEATURE_IMPORTANCE_CSV) and (
+        not os.path.exists(MODEL_PATH) or os.path.getmtime(FEATURE_IMPORTANCE_CSV) >= os.path.getmtime(MODEL_PATH)
+    ):
+        importance = pd.read_csv(FEATURE_IMPORTANCE_CSV)
+        return importance['feature'].tolist(), importance['importance'].to_numpy()
+    if not os.path.exists(MODEL_PATH):
+        return None
+    import joblib
+    model = joblib.load(MODEL_PATH)
+    if not hasattr(model, 'feature_importances_'):
+        print("Model doesn't have feature_importances_ attribute")
+        return None
+    features = ['LeadScore', 'comment_length', 'is_purchase_intent', 'is_interest_inquiry', 'is_positive',
+                'user_comment_count', 'has_purchase_keywords', 'has_timeline_urgency', 'discusses_financials']
+    return features, model.feature_importances_
 
 def main():
     if not os.path.exists(LEADS_PREDICTED_CSV):
         print("No predicted leads data found.")
         return
     
-    df = pd.read_csv(LEADS_PREDICTED_CSV)
+    # plotly is only imported once there is data to plot, keeping the early exit instant
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
+    df = read_csv_arrow(LEADS_PREDICTED_CSV, category_columns=('Intent', 'Sentiment', 'LeadQuality'))
     os.makedirs(IMG_DIR, exist_ok=True)
+    png_exports = []
 
     print(f"Total predicted leads: {len(df)}")
     print("Sample rows:")
@@ -22,49 +67,55 @@ def main():
 
     # 1. Conversion Probability Distribution
     fig1 = px.histogram(df, x='ConversionProbability', nbins=20, title='Conversion Probability Distribution')
-    fig1.write_html(f"{IMG_DIR}/conversion_probability_distribution.html")
-    fig1.show()
+    fig1.write_html(f"{IMG_DIR}/conversion_probability_distribution.html", include_plotlyjs=PLOTLY_INCLUDE_JS)
+    png_exports.append((fig1, f"{IMG_DIR}/conversion_probability_distribution.png"))
+    if INTERACTIVE:
+        fig1.show()
 
     # 2. Top 10 Leads Table
     print("\nTop 10 Predicted Leads:")
-    top_leads = df.nlargest(10, 'ConversionProbability')[['Username', 'Comment', 'ConversionProbability', 'LeadScore', 'Intent', 'Sentiment']]
+    top_leads = top_k_rows(df, 'ConversionProbability', 10)[['Username', 'Comment', 'ConversionProbability', 'LeadScore', 'Intent', 'Sentiment']]
     print(top_leads)
 
-    # 3. Feature Importance (if model available)
-    if os.path.exists(MODEL_PATH):
-        try:
-            model = joblib.load(MODEL_PATH)
-            if hasattr(model, 'feature_importances_'):
-                features = ['LeadScore', 'comment_length', 'is_purchase_intent', 'is_interest_inquiry', 'is_positive', 'user_comment_count']
-                importances = model.feature_importances_
-                fig2 = go.Figure([go.Bar(x=features, y=importances)])
-                fig2.update_layout(title="Feature Importances for Lead Conversion Prediction", yaxis_title="Importance")
-                fig2.write_html(f"{IMG_DIR}/feature_importances.html")
-                fig2.show()
-            else:
-                print("Model doesn't have feature_importances_ attribute")
-        except Exception as e:
-            print(f"Error loading model for feature importance: {e}")
+    # 3. Feature Importance (if available)
+    try:
+        feature_importances = load_feature_importances()
+    except Exception as e:
+        feature_importances = None
+        print(f"Error loading feature importances: {e}")
+    if feature_importances is not None:
+        features, importances = feature_importances
+        fig2 = go.Figure([go.Bar(x=features, y=importances)])
+        fig2.update_layout(title="Feature Importances for Lead Conversion Prediction", yaxis_title="Importance")
+        fig2.write_html(f"{IMG_DIR}/feature_importances.html", include_plotlyjs=PLOTLY_INCLUDE_JS)
+        png_exports.append((fig2, f"{IMG_DIR}/feature_importances.png"))
+        if INTERACTIVE:
+            fig2.show()
 
     # 4. Conversion Probability by Intent
     if 'Intent' in df.columns:
         fig3 = px.box(df, x='Intent', y='ConversionProbability', title='Conversion Probability by Intent')
-        fig3.write_html(f"{IMG_DIR}/conversion_probability_by_intent.html")
-        fig3.show()
+        fig3.write_html(f"{IMG_DIR}/conversion_probability_by_intent.html", include_plotlyjs=PLOTLY_INCLUDE_JS)
+        png_exports.append((fig3, f"{IMG_DIR}/conversion_probability_by_intent.png"))
+        if INTERACTIVE:
+            fig3.show()
 
     # 5. Conversion Probability by Sentiment
     if 'Sentiment' in df.columns:
         fig4 = px.box(df, x='Sentiment', y='ConversionProbability', title='Conversion Probability by Sentiment')
-        fig4.write_html(f"{IMG_DIR}/conversion_probability_by_sentiment.html")
-        fig4.show()
+        fig4.write_html(f"{IMG_DIR}/conversion_probability_by_sentiment.html", include_plotlyjs=PLOTLY_INCLUDE_JS)
+        png_exports.append((fig4, f"{IMG_DIR}/conversion_probability_by_sentiment.png"))
+        if INTERACTIVE:
+            fig4.show()
 
     # 6. Lead Score vs Conversion Probability Scatter
     if 'LeadScore' in df.columns:
         fig5 = px.scatter(df, x='LeadScore', y='ConversionProbability', 
                          color='Intent' if 'Intent' in df.columns else None,
                          title='Lead Score vs Conversion Probability')
-        fig5.write_html(f"{IMG_DIR}/leadscore_vs_probability.html")
-        fig5.show()
+        fig5.write_html(f"{IMG_DIR}/leadscore_vs_probability.html", include_plotlyjs=PLOTLY_INCLUDE_JS)
+        if INTERACTIVE:
+            fig5.show()
 
     # 7. High Probability Leads (95%+) Summary
     high_prob_leads = df[df['ConversionProbability'] >= 0.95]
@@ -73,6 +124,9 @@ def main():
         print("Top High-Probability Leads:")
         print(high_prob_leads[['Username', 'ConversionProbability', 'LeadScore', 'Intent']].head())
 
+    if EXPORT_PNG:
+        export_pngs(png_exports)
+
     print(f"\n[INFO] All predicted leads visualizations saved as HTML in the '{IMG_DIR}' directory.")
     print("[INFO] Open the HTML files in your browser to view and export PNGs using the camera icon.")
 
@@ -15,6 +15,13 @@ import argparse
 import os
 from pathlib import Path
 
+# One process per core; tests sharing an xdist_group (one Streamlit server, one AppTest) stay on one worker.
+# Not --dist=loadfile: the ungrouped tests use tmp_path fixtures, so they can spread across workers.
+# Passed here rather than in addopts so a plain pytest run works without pytest-xdist installed
+XDIST_ARGS = ["-n", "auto", "--dist=loadgroup"]
+# Load-time benchmarks: at least 3 timed rounds, capped at ~3s each
+BENCHMARK_ARGS = ["--benchmark-min-rounds=3", "--benchmark-max-time=3"]
+
 def get_python_cmd():
     """Detect environment and return appropriate Python command"""
     if os.path.exists('/.dockerenv') or os.environ.get('DOCKER_CONTAINER'):
@@ -45,18 +52,20 @@ def check_streamlit_running(port=8501):
     except requests.exceptions.RequestException:
         return False
 
+def run_streaming(cmd):
+    """Run a command, echoing its combined stdout/stderr line by line as it runs; returns the exit code"""
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+    with proc.stdout:
+        for line in proc.stdout:
+            print(line, end="", flush=True)
+    return proc.wait()
+
 def run_unit_tests():
     """Run unit tests using Streamlit's testing framework"""
     print("🧪 Running unit tests...")
     python_cmd = get_python_cmd()
-    cmd = [python_cmd, "-m", "pytest", "tests/test_streamlit_dashboard.py", "-v", "-m", "not browser"]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    print(result.stdout)
-    if result.stderr:
-        print("Errors:", result.stderr)
-    
-    return result.returncode == 0
+    cmd = [python_cmd, "-m", "pytest", "tests/test_streamlit_dashboard.py", "-v", "-m", "not browser", *XDIST_ARGS]
+    return run_streaming(cmd) == 0
 
 def run_browser_tests():
     """Run browser-based integration tests"""
@@ -68,14 +77,8 @@ def run_browser_tests():
     subprocess.run([python_cmd, "-m", "playwright", "install", "chromium"], 
                   capture_output=True)
     
-    cmd = [python_cmd, "-m", "pytest", "tests/test_streamlit_browser.py", "-v", "--headed"]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    print(result.stdout)
-    if result.stderr:
-        print("Errors:", result.stderr)
-    
-    return result.returncode == 0
+    cmd = [python_cmd, "-m", "pytest", "tests/test_streamlit_browser.py", "-v", "--headed", *XDIST_ARGS]
+    return run_streaming(cmd) == 0
 
 def run_manual_test():
     """Run manual test by starting Streamlit and opening browser"""
@@ -117,14 +120,8 @@ def run_performance_test():
     
     # Run specific performance tests
     python_cmd = get_python_cmd()
-    cmd = [python_cmd, "-m", "pytest", "tests/test_streamlit_dashboard.py::TestDashboardPerformance", "-v"]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    print(result.stdout)
-    if result.stderr:
-        print("Errors:", result.stderr)
-    
-    return result.returncode == 0
+    cmd = [python_cmd, "-m", "pytest", "tests/test_streamlit_dashboard.py::TestDashboardPerformance", "-v", *BENCHMARK_ARGS]
+    return run_streaming(cmd) == 0
 
 def run_all_tests():
     """Run all tests in sequence"""
@@ -171,16 +168,18 @@ def install_test_dependencies():
         "pytest>=7.4.0",
         "pytest-playwright>=0.4.0",
         "pytest-cov>=4.1.0",
+        "pytest-xdist>=3.5.0",
+        "pytest-benchmark>=4.0.0",
         "requests>=2.31.0"
     ]
     
-    for dep in dependencies:
-        print(f"Installing {dep}...")
-        result = subprocess.run(["uv", "add", dep], capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"❌ Failed to install {dep}")
-            print(result.stderr)
-            return False
+    # One uv add resolves and installs everything in a single process
+    print(f"Installing {', '.join(dependencies)}...")
+    result = subprocess.run(["uv", "add", *dependencies], capture_output=True, text=True)
+    if result.returncode != 0:
+        print("❌ Failed to install test dependencies")
+        print(result.stderr)
+        return False
     
     # Install Playwright browsers
     print("Installing Playwright browsers...")
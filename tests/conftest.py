@@ -0,0 +1,151 @@
+"""
+Shared fixtures for the test suite
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess as sp
+import time
+from functools import lru_cache
+
+import pytest
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    pytest_benchmark = None
+
+# Configuration
+PORT = "8502"  # Use different port to avoid conflicts with a dev server on 8501
+
+
+def wait_for_health(playwright, base_url, timeout=30):
+    """
+    Poll Streamlit's health endpoint from 50ms, backing off to 0.5s; True once it
+    answers. Uses Playwright's own request context (one keep-alive pool, no requests)
+    """
+    from playwright.sync_api import Error as PlaywrightError
+
+    deadline = time.monotonic() + timeout
+    backoff = 0.05
+    api = playwright.request.new_context()
+    try:
+        while time.monotonic() < deadline:
+            try:
+                if api.get(f"{base_url}/_stcore/health", timeout=500).ok:
+                    return True
+            except PlaywrightError:
+                pass  # not listening yet
+            time.sleep(backoff)
+            backoff = min(backoff * 1.3, 0.5)
+        return False
+    finally:
+        api.dispose()
+
+
+def wait_for_port_release(port, timeout=10):
+    """Wait until nothing accepts connections on the port, e.g. a stopped server has exited"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("localhost", int(port))) != 0:
+                return
+        time.sleep(0.05)
+
+
+@pytest.fixture(scope="session")
+def run_streamlit(tmp_path_factory, playwright):
+    """
+    Run the Streamlit app for testing and return its base URL. Under pytest-xdist
+    the first worker to need it starts one server for the whole run, the others
+    attach to it, and the last one to finish stops it.
+    """
+    # Imported here so collecting the rest of the suite does not need filelock
+    from filelock import FileLock
+
+    # Each xdist worker gets its own basetemp; their shared parent is unique to this run
+    shared_dir = tmp_path_factory.getbasetemp()
+    if os.environ.get("PYTEST_XDIST_WORKER"):
+        shared_dir = shared_dir.parent
+    state_path = shared_dir / "streamlit.json"
+    lock = FileLock(str(shared_dir / "streamlit.lock"))
+
+    process = None
+    with lock:
+        if state_path.exists():
+            state = json.loads(state_path.read_text())
+        else:
+            base_url = f"http://localhost:{PORT}"
+            print(f"Starting Streamlit on port {PORT}...")
+            process = sp.Popen([
+                "streamlit", "run", "dashboard/streamlit_dashboard.py",
+                "--server.port", PORT,
+                "--server.headless", "true",
+                "--server.runOnSave", "false",
+                "--server.address", "localhost",
+                # No file-watcher thread, telemetry or info logging in test runs
+                "--server.fileWatcherType", "none",
+                "--browser.gatherUsageStats", "false",
+                "--logger.level", "error"
+            ])
+            if not wait_for_health(playwright, base_url):
+                process.kill()
+                raise Exception("Failed to start Streamlit")
+            print(f"✅ Streamlit started successfully on {base_url}")
+            state = {"pid": process.pid, "base_url": base_url, "users": 0}
+        state["users"] += 1
+        state_path.write_text(json.dumps(state))
+
+    yield state["base_url"]
+
+    # Cleanup
+    with lock:
+        state = json.loads(state_path.read_text())
+        state["users"] -= 1
+        if state["users"] > 0:
+            state_path.write_text(json.dumps(state))
+        else:
+            print("Stopping Streamlit...")
+            state_path.unlink()
+            try:
+                os.kill(state["pid"], signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            # Still under the lock: a worker starting a new server must not find the old one answering
+            wait_for_port_release(PORT)
+    if process is not None:
+        process.wait()
+
+
+if pytest_benchmark is None:
+    @pytest.fixture
+    def benchmark():
+        """Stand-in for pytest-benchmark's fixture: skip load-time benchmarks when the plugin is missing"""
+        pytest.skip("pytest-benchmark is not installed")
+
+
+@pytest.fixture(scope="session")
+def shared_tmp(tmp_path_factory):
+    """One directory for read-only artifacts written once per run; tests needing isolation use tmp_path"""
+    return tmp_path_factory.mktemp("utils_tests")
+
+
+@lru_cache(maxsize=1)
+def _comments_template():
+    """A small valid comments table, built (and its dtypes inferred) once per process"""
+    import pandas as pd
+
+    return pd.DataFrame({
+        "Comment": ["Great EV!", "Love Tesla", "Expensive cars"],
+        "Username": ["user1", "user2", "user3"],
+        "Timestamp": ["2023-01-01T12:00:00Z"] * 3,
+        "VideoID": ["vid1"] * 3
+    })
+
+
+@pytest.fixture(scope="session")
+def sample_comments_df():
+    """The shared comments template itself; tests derive variants (drop, assign) rather than modify it"""
+    return _comments_template()
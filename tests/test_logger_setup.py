@@ -0,0 +1,74 @@
+"""
+Unit tests for the pipeline logging setup
+"""
+
+import json
+import logging
+import logging.handlers
+
+import pytest
+
+from scripts import logger_setup
+
+
+@pytest.fixture
+def fresh_logging(tmp_path, monkeypatch):
+    """Run setup_logging from scratch in tmp_path, and undo everything it configured afterwards"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(logger_setup, "_configured", False)
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    root.handlers = []
+    touched = []
+    yield touched
+    logger_setup._stop_queue_listeners()
+    for logger in [root] + [logging.getLogger(name) for name in touched]:
+        for handler in logger.handlers:
+            handler.close()
+        logger.handlers = []
+    root.handlers, root.level = saved_handlers, saved_level
+
+
+def read_lines(path):
+    return path.read_text().splitlines()
+
+
+def test_basic_config_writes_each_record_once(tmp_path, fresh_logging):
+    """Without a config file, records reach logs/pipeline.log once, via the queue"""
+    # pytest's log capture handlers on root would make basicConfig a no-op
+    logging.getLogger().handlers = []
+    logger_setup.setup_logging(config_path=str(tmp_path / "missing.json"))
+    assert any(isinstance(h, logging.handlers.QueueHandler) for h in logging.getLogger().handlers)
+
+    logging.getLogger("basic.test").info("hello")
+    logger_setup._stop_queue_listeners()
+
+    lines = [line for line in read_lines(tmp_path / "logs" / "pipeline.log") if line.endswith("INFO: hello")]
+    assert len(lines) == 1
+
+
+def test_multi_logger_config_keeps_routing(tmp_path, fresh_logging):
+    """File handlers on a child logger and on root: no duplicated lines, no records in foreign files"""
+    fresh_logging.extend(["app.child", "app.other"])
+    config = {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {"plain": {"format": "%(name)s %(message)s"}},
+        "handlers": {
+            "child_file": {"class": "logging.FileHandler", "filename": "logs/child.log", "formatter": "plain"},
+            "root_file": {"class": "logging.FileHandler", "filename": "logs/root.log", "formatter": "plain"},
+        },
+        "loggers": {"app.child": {"level": "INFO", "handlers": ["child_file"]}},
+        "root": {"level": "INFO", "handlers": ["root_file"]},
+    }
+    config_path = tmp_path / "logging_config.json"
+    config_path.write_text(json.dumps(config))
+
+    logger_setup.setup_logging(config_path=str(config_path))
+    logging.getLogger("app.child").info("from child")
+    logging.getLogger("app.other").info("from other")
+    logger_setup._stop_queue_listeners()
+
+    # The child's record propagates to root once; the other logger only ever reaches root
+    assert read_lines(tmp_path / "logs" / "child.log") == ["app.child from child"]
+    assert read_lines(tmp_path / "logs" / "root.log") == ["app.child from child", "app.other from other"]
@@ -3,130 +3,130 @@ Browser-based integration tests for Streamlit dashboard using Playwright
 Based on: https://www.stefsmeets.nl/posts/streamlit-pytest/
 """
 
+import logging
 import pytest
-import subprocess as sp
 import time
-import requests
-from playwright.sync_api import Page, expect
+from playwright.sync_api import Page, expect, TimeoutError as PlaywrightTimeoutError
 
-# Configuration
-PORT = "8502"  # Use different port to avoid conflicts
-BASE_URL = f"http://localhost:{PORT}"
+# Findings go to record_property (the JUnit report) or the log, which pytest buffers and
+# only shows for failures, rather than print() to stdout on every passing test
+logger = logging.getLogger(__name__)
 
-@pytest.fixture(scope="module", autouse=True)
-def run_streamlit():
-    """Run the Streamlit app for testing"""
-    print(f"Starting Streamlit on port {PORT}...")
-    
-    # Start Streamlit process
-    p = sp.Popen([
-        "streamlit", "run", "dashboard/streamlit_dashboard.py",
-        "--server.port", PORT,
-        "--server.headless", "true",
-        "--server.runOnSave", "false",
-        "--server.address", "localhost"
-    ])
-    
-    # Wait for Streamlit to start
-    max_attempts = 30
-    for attempt in range(max_attempts):
-        try:
-            response = requests.get(f"{BASE_URL}/_stcore/health", timeout=1)
-            if response.status_code == 200:
-                print(f"✅ Streamlit started successfully on {BASE_URL}")
-                break
-        except requests.exceptions.RequestException:
-            if attempt < max_attempts - 1:
-                time.sleep(1)
-                continue
-            else:
-                p.kill()
-                raise Exception("Failed to start Streamlit")
-    
-    yield
-    
-    # Cleanup
-    print("Stopping Streamlit...")
-    p.kill()
-    p.wait()
+# The dashboard server comes from conftest.run_streamlit, one per test run
+pytestmark = pytest.mark.usefixtures("run_streamlit")
+
+def wait_ready(page):
+    """
+    Wait until the app is rendered and no script run is in progress; expect()
+    retries until the condition holds instead of always sitting out a fixed poll
+    """
+    expect(page.locator("[data-testid='stAppViewContainer']")).to_be_visible(timeout=15000)
+    expect(page.get_by_text("Running...")).to_be_hidden(timeout=30000)
+    page.wait_for_load_state("networkidle", timeout=5000)
+
+def open_options(page):
+    """Options of the selectbox just clicked, as soon as the list appears (at most 1s)"""
+    options = page.locator("div[data-baseweb='select'] li")
+    try:
+        options.first.wait_for(state="visible", timeout=1000)
+    except PlaywrightTimeoutError:
+        pass
+    return options
+
+def count_selectors(page, selectors):
+    """Element count per CSS selector ({name: selector} -> {name: count}) in one page round-trip"""
+    return page.evaluate(
+        "sels => Object.fromEntries(Object.entries(sels).map(([k, v]) => [k, document.querySelectorAll(v).length]))",
+        selectors
+    )
+
+@pytest.fixture(scope="module")
+def ready_page(run_streamlit, browser, browser_context_args):
+    """One browser context per module with the dashboard rendered once, instead of a cold render per test"""
+    context = browser.new_context(**browser_context_args)
+    page = context.new_page()
+    page.goto(run_streamlit)
+    wait_ready(page)
+    initial_viewport = page.viewport_size
+    yield page, initial_viewport
+    context.close()
 
+@pytest.fixture
+def dashboard(ready_page):
+    """The shared dashboard page, reset to a neutral state after the previous test"""
+    page, initial_viewport = ready_page
+    page.keyboard.press("Escape")  # close any selectbox a previous test left open
+    if initial_viewport and page.viewport_size != initial_viewport:
+        page.set_viewport_size(initial_viewport)
+    # A previous interaction may have triggered a rerun; wait until it settles
+    wait_ready(page)
+    page.evaluate("window.scrollTo(0, 0)")
+    return page
+
+@pytest.mark.xdist_group("browser")
 class TestStreamlitBrowser:
     """Browser-based tests for Streamlit dashboard"""
     
-    def test_page_loads_successfully(self, page: Page):
+    def test_page_loads_successfully(self, dashboard: Page):
         """Test that the main page loads without errors"""
-        page.goto(BASE_URL)
-        
-        # Wait for Streamlit to finish loading
-        page.get_by_text("Running...").wait_for(state="detached", timeout=30000)
-        
         # Check page title
-        expect(page).to_have_title("streamlit_dashboard")
+        expect(dashboard).to_have_title("streamlit_dashboard")
         
         # Check that main content is visible
-        expect(page.locator("div[data-testid='stApp']")).to_be_visible()
+        expect(dashboard.locator("div[data-testid='stApp']")).to_be_visible()
     
-    def test_sidebar_navigation(self, page: Page):
+    def test_sidebar_navigation(self, dashboard: Page, record_property):
         """Test sidebar navigation functionality"""
-        page.goto(BASE_URL)
-        page.get_by_text("Running...").wait_for(state="detached", timeout=30000)
-        
         # Check if sidebar exists
-        sidebar = page.locator("section[data-testid='stSidebar']")
+        sidebar = dashboard.locator("section[data-testid='stSidebar']")
         expect(sidebar).to_be_visible()
         
         # Look for navigation elements
-        selectbox = page.locator("div[data-testid='stSelectbox']").first
+        selectbox = dashboard.locator("div[data-testid='stSelectbox']").first
         if selectbox.is_visible():
             # Click on selectbox to open options
             selectbox.click()
             
-            # Wait a moment for options to appear
-            page.wait_for_timeout(1000)
-            
             # Check if options are available
-            options = page.locator("div[data-baseweb='select'] li")
-            if options.count() > 0:
-                print(f"✅ Found {options.count()} navigation options")
+            options = open_options(dashboard)
+            record_property("navigation_options", options.count())
     
-    def test_dashboard_interactivity(self, page: Page):
+    def test_dashboard_interactivity(self, dashboard: Page, record_property):
         """Test interactive elements on the dashboard"""
-        page.goto(BASE_URL)
-        page.get_by_text("Running...").wait_for(state="detached", timeout=30000)
-        
         # Look for interactive elements
-        buttons = page.locator("button[data-testid='baseButton-secondary']")
-        selectboxes = page.locator("div[data-testid='stSelectbox']")
-        sliders = page.locator("div[data-testid='stSlider']")
-        
-        interactive_elements = buttons.count() + selectboxes.count() + sliders.count()
+        interactive_elements = sum(count_selectors(dashboard, {
+            "buttons": "button[data-testid='baseButton-secondary']",
+            "selectboxes": "div[data-testid='stSelectbox']",
+            "sliders": "div[data-testid='stSlider']"
+        }).values())
         
         assert interactive_elements > 0, "No interactive elements found on dashboard"
-        print(f"✅ Found {interactive_elements} interactive elements")
+        record_property("interactive_elements", interactive_elements)
     
-    def test_data_visualization_elements(self, page: Page):
+    def test_data_visualization_elements(self, dashboard: Page, record_property):
         """Test that data visualizations are present"""
-        page.goto(BASE_URL)
-        page.get_by_text("Running...").wait_for(state="detached", timeout=30000)
+        visualization_selectors = {
+            "plotly_charts": "div[data-testid='stPlotlyChart']",
+            "dataframes": "div[data-testid='stDataFrame']",
+            "metrics": "div[data-testid='metric-container']"
+        }
         
-        # Wait for content to load
-        page.wait_for_timeout(3000)
+        # Wait for the first chart, table or metric to render (returns as soon as one does)
+        try:
+            dashboard.wait_for_function(
+                "sel => document.querySelector(sel) !== null", arg=", ".join(visualization_selectors.values()), timeout=5000
+            )
+        except PlaywrightTimeoutError:
+            pass  # the assertion below reports the missing content
         
         # Look for various visualization elements
-        plotly_charts = page.locator("div[data-testid='stPlotlyChart']")
-        dataframes = page.locator("div[data-testid='stDataFrame']")
-        metrics = page.locator("div[data-testid='metric-container']")
-        
-        total_visualizations = plotly_charts.count() + dataframes.count() + metrics.count()
+        total_visualizations = sum(count_selectors(dashboard, visualization_selectors).values())
         
         assert total_visualizations > 0, "No data visualizations found"
-        print(f"✅ Found {total_visualizations} data visualization elements")
+        record_property("visualization_elements", total_visualizations)
     
-    def test_responsive_design(self, page: Page):
+    def test_responsive_design(self, dashboard: Page):
         """Test dashboard responsiveness on different screen sizes"""
-        page.goto(BASE_URL)
-        page.get_by_text("Running...").wait_for(state="detached", timeout=30000)
-        
         # Test different viewport sizes
         viewports = [
             {"width": 1920, "height": 1080},  # Desktop
@@ -135,131 +135,123 @@ class TestStreamlitBrowser:
         ]
         
         for viewport in viewports:
-            page.set_viewport_size(viewport)
-            page.wait_for_timeout(1000)
+            dashboard.set_viewport_size(viewport)
             
-            # Check that main content is still visible
-            main_content = page.locator("div[data-testid='stApp']")
-            expect(main_content).to_be_visible()
+            # Check that the layout sees the new width and main content is still visible, in one
+            # round-trip; reading the app's box forces the reflow, so no fixed sleep is needed
+            layout = dashboard.evaluate("""() => {
+                const app = document.querySelector("div[data-testid='stApp']");
+                const box = app && app.getBoundingClientRect();
+                return {width: window.innerWidth, visible: !!box && box.width > 0 && box.height > 0};
+            }""")
+            assert layout["width"] == viewport["width"], f"Viewport not applied: {layout['width']}px"
+            assert layout["visible"], f"Main content hidden at {viewport['width']}x{viewport['height']}"
             
-            print(f"✅ Dashboard responsive at {viewport['width']}x{viewport['height']}")
+            logger.info("Dashboard responsive at %dx%d", viewport["width"], viewport["height"])
     
-    def test_error_handling(self, page: Page):
+    def test_error_handling(self, dashboard: Page, record_property):
         """Test error handling in the dashboard"""
-        page.goto(BASE_URL)
-        page.get_by_text("Running...").wait_for(state="detached", timeout=30000)
-        
         # Look for error messages or warnings
-        errors = page.locator("div[data-testid='stException']")
-        warnings = page.locator("div[data-testid='stAlert']")
+        counts = count_selectors(dashboard, {
+            "errors": "div[data-testid='stException']",
+            "warnings": "div[data-testid='stAlert']"
+        })
         
         # Dashboard should not have critical errors
-        assert errors.count() == 0, f"Found {errors.count()} errors on dashboard"
-        
-        if warnings.count() > 0:
-            print(f"ℹ️ Found {warnings.count()} warnings (may be expected)")
-        else:
-            print("✅ No errors or warnings found")
+        assert counts["errors"] == 0, f"Found {counts['errors']} errors on dashboard"
+        # Warnings may be expected (e.g. missing optional data), so they are only recorded
+        record_property("warnings", counts["warnings"])
     
-    def test_performance_metrics(self, page: Page):
+    def test_performance_metrics(self, page: Page, run_streamlit, benchmark, record_property):
         """Test dashboard performance metrics"""
-        # Measure page load time
-        start_time = time.time()
-        
-        page.goto(BASE_URL)
-        page.get_by_text("Running...").wait_for(state="detached", timeout=30000)
-        
-        # Wait for all content to load
-        page.wait_for_timeout(2000)
+        # Uses its own fresh page rather than the shared one: the page load is what is measured
+        def load_page():
+            page.goto(run_streamlit)
+            
+            # Wait for all content to load
+            wait_ready(page)
         
-        load_time = time.time() - start_time
+        # Measure page load time
+        start_time = time.perf_counter()
+        benchmark.pedantic(load_page, rounds=3, iterations=1, warmup_rounds=1)
+        # Median of the timed rounds; one plain call when benchmarking is off (e.g. under xdist)
+        load_time = benchmark.stats.stats.median if benchmark.stats else time.perf_counter() - start_time
         
         # Dashboard should load within reasonable time
         assert load_time < 30, f"Dashboard took too long to load: {load_time:.2f} seconds"
-        print(f"✅ Dashboard loaded in {load_time:.2f} seconds")
+        record_property("load_time_seconds", round(load_time, 3))
     
-    def test_accessibility_basics(self, page: Page):
+    def test_accessibility_basics(self, dashboard: Page):
         """Test basic accessibility features"""
-        page.goto(BASE_URL)
-        page.get_by_text("Running...").wait_for(state="detached", timeout=30000)
-        
         # Check for basic accessibility elements
-        headings = page.locator("h1, h2, h3, h4, h5, h6")
-        buttons = page.locator("button")
+        headings = dashboard.locator("h1, h2, h3, h4, h5, h6")
+        buttons = dashboard.locator("button")
         
         # Should have some structure
         assert headings.count() > 0, "No headings found for accessibility"
         
-        # Check that buttons have accessible text
-        for i in range(min(buttons.count(), 5)):  # Check first 5 buttons
-            button = buttons.nth(i)
-            if button.is_visible():
-                text_content = button.text_content()
-                assert text_content and text_content.strip(), f"Button {i} has no accessible text"
-        
-        print("✅ Basic accessibility checks passed")
+        # Check that buttons have accessible text: visibility and text of the first 5 buttons
+        # in one page round-trip (visible as Playwright defines it: a non-empty box, not hidden)
+        first_buttons = buttons.evaluate_all("""buttons => buttons.slice(0, 5).map(b => {
+            const box = b.getBoundingClientRect();
+            return {
+                visible: box.width > 0 && box.height > 0 && getComputedStyle(b).visibility !== 'hidden',
+                text: (b.textContent || '').trim()
+            };
+        })""")
+        for i, button in enumerate(first_buttons):
+            if button["visible"]:
+                assert button["text"], f"Button {i} has no accessible text"
 
+@pytest.mark.xdist_group("browser")
 class TestDashboardFunctionality:
     """Test specific dashboard functionality"""
     
-    def test_data_filtering(self, page: Page):
+    def test_data_filtering(self, dashboard: Page):
         """Test data filtering functionality"""
-        page.goto(BASE_URL)
-        page.get_by_text("Running...").wait_for(state="detached", timeout=30000)
-        
         # Look for filter controls
-        selectboxes = page.locator("div[data-testid='stSelectbox']")
-        multiselects = page.locator("div[data-testid='stMultiSelect']")
+        selectboxes = dashboard.locator("div[data-testid='stSelectbox']")
+        multiselects = dashboard.locator("div[data-testid='stMultiSelect']")
         
         if selectboxes.count() > 0:
             # Try interacting with first selectbox
             first_selectbox = selectboxes.first
             first_selectbox.click()
-            page.wait_for_timeout(1000)
             
             # Look for options
-            options = page.locator("div[data-baseweb='select'] li")
+            options = open_options(dashboard)
             if options.count() > 1:
                 # Select second option
                 options.nth(1).click()
-                page.wait_for_timeout(2000)
-                
-                print("✅ Filter interaction successful")
+                wait_ready(dashboard)
+                logger.info("Filter interaction successful")
     
-    def test_export_functionality(self, page: Page):
+    def test_export_functionality(self, dashboard: Page, record_property):
         """Test data export functionality if available"""
-        page.goto(BASE_URL)
-        page.get_by_text("Running...").wait_for(state="detached", timeout=30000)
-        
         # Look for download buttons
-        download_buttons = page.locator("button").filter(has_text="Download")
+        download_buttons = dashboard.locator("button").filter(has_text="Download")
         
-        if download_buttons.count() > 0:
-            print(f"✅ Found {download_buttons.count()} download buttons")
-        else:
-            print("ℹ️ No download functionality found (optional feature)")
+        # Optional feature, so the count is recorded rather than asserted
+        record_property("download_buttons", download_buttons.count())
     
-    def test_real_time_updates(self, page: Page):
+    def test_real_time_updates(self, dashboard: Page, record_property):
         """Test if dashboard updates properly"""
-        page.goto(BASE_URL)
-        page.get_by_text("Running...").wait_for(state="detached", timeout=30000)
-        
-        # Take initial screenshot for comparison
-        initial_content = page.locator("div[data-testid='stApp']").inner_html()
-        
         # Interact with controls if available
-        buttons = page.locator("button[data-testid='baseButton-secondary']")
+        buttons = dashboard.locator("button[data-testid='baseButton-secondary']")
         if buttons.count() > 0:
+            # Count DOM mutations in-page instead of shipping the app's HTML over before and after
+            dashboard.evaluate("""() => {
+                window.__appMutations = 0;
+                window.__appObserver = new MutationObserver(records => { window.__appMutations += records.length; });
+                window.__appObserver.observe(document.querySelector("div[data-testid='stApp']"),
+                                             {subtree: true, childList: true, attributes: true, characterData: true});
+            }""")
             buttons.first.click()
-            page.wait_for_timeout(2000)
+            wait_ready(dashboard)
             
             # Check if content changed
-            updated_content = page.locator("div[data-testid='stApp']").inner_html()
-            
-            if initial_content != updated_content:
-                print("✅ Dashboard updates dynamically")
-            else:
-                print("ℹ️ No dynamic updates detected")
+            mutations = dashboard.evaluate("() => { window.__appObserver.disconnect(); return window.__appMutations; }")
+            record_property("dom_mutations", mutations)
 
 if __name__ == "__main__":
     # Run browser tests